@@ -1,5 +1,7 @@
 
 import asyncio
+import mmap
+import os
 import sys
 from server.stt.whisper import WhisperSTT
 
@@ -14,14 +16,21 @@ async def main():
     await stt.initialize()
 
     try:
-        with open(audio_file, "rb") as f:
-            audio_data = f.read()
+        f = open(audio_file, "rb")
     except FileNotFoundError:
         print(f"Error: Audio file not found at {audio_file}")
         sys.exit(1)
 
     print(f"Transcribing {audio_file}...")
-    transcription = await stt.transcribe(audio_data)
+    # Map the file instead of reading it into a bytes copy; the STT layer
+    # only needs a buffer (np.frombuffer)
+    with f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap can't map an empty file; transcribe no audio as before
+            transcription = await stt.transcribe(b"")
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as audio_data:
+                transcription = await stt.transcribe(audio_data)
     print("\nTranscription:")
     print(transcription)
 
@@ -5,16 +5,21 @@ Manages ComfyUI as an embedded service within Felix
 
 import os
 import sys
+import json
+import uuid
 import asyncio
-import subprocess
 import httpx
 import structlog
+import websockets
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator
 import signal
 
 logger = structlog.get_logger(__name__)
 
+# Client ID used for queued prompts; ComfyUI routes execution events to it
+CLIENT_ID = "felix"
+
 class ComfyUIService:
     """Manages ComfyUI as an embedded service"""
     
@@ -33,13 +38,23 @@ class ComfyUIService:
         self.comfy_dir = Path(comfy_dir) if comfy_dir else Path(__file__).parent.parent / "comfy"
         self.host = host
         self.port = port
-        self.process: Optional[subprocess.Popen] = None
-        self.client: Optional[httpx.AsyncClient] = None
+        self.process: Optional[asyncio.subprocess.Process] = None
         self._is_ready = False
+        self._start_lock = asyncio.Lock()  # Serializes start/stop transitions
+        self._drain_tasks: list[asyncio.Task] = []
+        
+        # WebSocket event stream (see connect_ws)
+        self._ws = None
+        self._ws_task: Optional[asyncio.Task] = None
+        self._ws_lock = asyncio.Lock()  # One connect/close at a time, so only one socket exists
+        self._prompt_waiters: Dict[str, asyncio.Future] = {}
         
         if not self.comfy_dir.exists():
             raise FileNotFoundError(f"ComfyUI directory not found: {self.comfy_dir}")
         
+        # Pooled HTTP client, shared by readiness probes and API calls
+        self.client: Optional[httpx.AsyncClient] = self._create_client()
+        
         logger.info("comfy_service_initialized", 
                    comfy_dir=str(self.comfy_dir),
                    host=self.host, 
@@ -50,10 +65,23 @@ class ComfyUIService:
         """Get the base URL for ComfyUI API"""
         return f"http://{self.host}:{self.port}"
     
+    @property
+    def ws_url(self) -> str:
+        """Get the WebSocket URL for ComfyUI execution events"""
+        return f"ws://{self.host}:{self.port}/ws?clientId={CLIENT_ID}"
+    
+    def _create_client(self) -> httpx.AsyncClient:
+        """Create the pooled HTTP client for the ComfyUI API"""
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(30.0),
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=100)
+        )
+    
     @property
     def is_running(self) -> bool:
         """Check if ComfyUI process is running"""
-        return self.process is not None and self.process.poll() is None
+        return self.process is not None and self.process.returncode is None
     
     async def start(self) -> bool:
         """
@@ -62,10 +90,27 @@ class ComfyUIService:
         Returns:
             True if started successfully, False otherwise
         """
+        async with self._start_lock:
+            # Re-check under the lock: a concurrent caller may have started it
+            if self.is_running:
+                logger.warning("comfy_already_running")
+                return True
+            
+            return await self._start()
+    
+    async def ensure_started(self) -> bool:
+        """
+        Start ComfyUI unless it is already running
+        
+        Returns:
+            True if running, False if it failed to start
+        """
         if self.is_running:
-            logger.warning("comfy_already_running")
             return True
-        
+        return await self.start()
+    
+    async def _start(self) -> bool:
+        """Start the subprocess and wait for readiness (caller holds _start_lock)"""
         try:
             # Prepare environment
             env = os.environ.copy()
@@ -82,34 +127,39 @@ class ComfyUIService:
             
             logger.info("starting_comfyui", cmd=" ".join(cmd), cwd=str(self.comfy_dir))
             
-            self.process = subprocess.Popen(
-                cmd,
+            # Client is closed by stop(); recreate it when restarting
+            if self.client is None:
+                self.client = self._create_client()
+            
+            self.process = await asyncio.create_subprocess_exec(
+                *cmd,
                 cwd=self.comfy_dir,
                 env=env,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
                 preexec_fn=os.setsid  # Create new process group for clean shutdown
             )
             
+            # Keep the pipes flowing; ComfyUI blocks on write() once a pipe buffer fills
+            self._drain_tasks = [
+                asyncio.create_task(self._drain(self.process.stdout, "stdout")),
+                asyncio.create_task(self._drain(self.process.stderr, "stderr")),
+            ]
+            
             # Wait for server to be ready
             self._is_ready = await self._wait_for_ready(timeout=30)
             
             if self._is_ready:
-                # Create HTTP client
-                self.client = httpx.AsyncClient(
-                    base_url=self.base_url,
-                    timeout=httpx.Timeout(30.0)
-                )
                 logger.info("comfyui_started", url=self.base_url)
                 return True
             else:
                 logger.error("comfyui_failed_to_start")
-                await self.stop()
+                await self._stop()
                 return False
                 
         except Exception as e:
             logger.error("comfyui_start_error", error=str(e))
-            await self.stop()
+            await self._stop()
             return False
     
     async def _wait_for_ready(self, timeout: int = 30) -> bool:
@@ -123,6 +173,7 @@ class ComfyUIService:
             True if ready, False if timeout
         """
         start_time = asyncio.get_event_loop().time()
+        delay = 0.25  # Exponential backoff between probes, capped at 4s
         
         while (asyncio.get_event_loop().time() - start_time) < timeout:
             if not self.is_running:
@@ -130,21 +181,28 @@ class ComfyUIService:
                 return False
             
             try:
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(f"{self.base_url}/system_stats", timeout=2.0)
-                    if response.status_code == 200:
-                        logger.info("comfyui_ready")
-                        return True
+                response = await self.client.get("/system_stats", timeout=2.0)
+                if response.status_code == 200:
+                    logger.info("comfyui_ready")
+                    return True
             except (httpx.RequestError, httpx.TimeoutException):
                 pass
             
-            await asyncio.sleep(1)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 4.0)
         
         logger.error("comfyui_ready_timeout")
         return False
     
     async def stop(self):
         """Stop ComfyUI server"""
+        async with self._start_lock:
+            await self._stop()
+    
+    async def _stop(self):
+        """Tear down the WebSocket, HTTP client and subprocess (caller holds _start_lock)"""
+        await self.close_ws()
+        
         if self.client:
             await self.client.aclose()
             self.client = None
@@ -154,13 +212,13 @@ class ComfyUIService:
                 # Send SIGTERM to process group
                 os.killpg(os.getpgid(self.process.pid), signal.SIGTERM)
                 
-                # Wait for graceful shutdown
+                # Wait for graceful shutdown without blocking the event loop
                 try:
-                    self.process.wait(timeout=10)
-                except subprocess.TimeoutExpired:
+                    await asyncio.wait_for(self.process.wait(), timeout=10)
+                except asyncio.TimeoutError:
                     # Force kill if not stopped
                     os.killpg(os.getpgid(self.process.pid), signal.SIGKILL)
-                    self.process.wait()
+                    await self.process.wait()
                 
                 logger.info("comfyui_stopped")
             except Exception as e:
@@ -168,6 +226,109 @@ class ComfyUIService:
             finally:
                 self.process = None
                 self._is_ready = False
+        
+        for task in self._drain_tasks:
+            task.cancel()
+        self._drain_tasks = []
+    
+    async def _drain(self, stream: asyncio.StreamReader, name: str):
+        """Forward ComfyUI output to the log line by line"""
+        while True:
+            try:
+                line = await stream.readline()
+            except ValueError:
+                # Over-long line (e.g. progress bar redraws); readline already discarded it
+                continue
+            if not line:
+                break
+            text = line.decode(errors="replace").rstrip()
+            if text:
+                logger.info("comfyui_output", stream=name, line=text)
+    
+    async def connect_ws(self):
+        """
+        Connect to the ComfyUI WebSocket event stream
+        
+        Safe to call repeatedly or concurrently; does nothing if already connected.
+        """
+        async with self._ws_lock:
+            if self._ws_task is not None and not self._ws_task.done():
+                return
+            
+            self._ws = await websockets.connect(self.ws_url, max_size=None)
+            self._ws_task = asyncio.create_task(self._ws_reader(self._ws))
+            logger.info("comfyui_ws_connected", url=self.ws_url)
+    
+    async def close_ws(self):
+        """Close the WebSocket event stream"""
+        async with self._ws_lock:
+            if self._ws is not None:
+                await self._ws.close()
+                self._ws = None
+            
+            if self._ws_task is not None:
+                try:
+                    await self._ws_task
+                except Exception:
+                    pass
+                self._ws_task = None
+    
+    async def _ws_reader(self, ws):
+        """Dispatch ComfyUI events to prompts waiting on completion"""
+        try:
+            async for raw in ws:
+                # Binary frames carry latent previews; only JSON events matter here
+                if isinstance(raw, bytes):
+                    continue
+                self._dispatch_ws_message(json.loads(raw))
+        except websockets.ConnectionClosed:
+            pass
+        except Exception as e:
+            logger.error("comfyui_ws_error", error=str(e))
+        finally:
+            if self._ws is ws:
+                self._ws = None
+            for waiter in self._prompt_waiters.values():
+                if not waiter.done():
+                    waiter.set_exception(RuntimeError("ComfyUI event stream closed"))
+            logger.info("comfyui_ws_closed")
+    
+    def _dispatch_ws_message(self, message: Dict[str, Any]):
+        """Resolve the waiter for a prompt when its execution finishes"""
+        data = message.get("data") or {}
+        waiter = self._prompt_waiters.get(data.get("prompt_id"))
+        if waiter is None or waiter.done():
+            return
+        
+        msg_type = message.get("type")
+        if msg_type == "executing" and data.get("node") is None:
+            # Sent after the prompt's history entry has been written
+            waiter.set_result(None)
+        elif msg_type == "execution_error":
+            waiter.set_exception(RuntimeError(data.get("exception_message", "ComfyUI execution failed")))
+        elif msg_type == "execution_interrupted":
+            waiter.set_exception(RuntimeError("ComfyUI execution was interrupted"))
+    
+    async def wait_for_prompt(self, prompt_id: str, timeout: float = 120.0):
+        """
+        Wait for a queued prompt to finish executing
+        
+        Args:
+            prompt_id: ID returned by queue_prompt (queued while connected)
+            timeout: Maximum seconds to wait
+            
+        Raises:
+            asyncio.TimeoutError: If the prompt does not finish in time
+            RuntimeError: If execution fails or the event stream drops
+        """
+        waiter = self._prompt_waiters.get(prompt_id)
+        if waiter is None:
+            raise RuntimeError(f"Prompt {prompt_id} was not queued with an event stream connected")
+        
+        try:
+            await asyncio.wait_for(waiter, timeout=timeout)
+        finally:
+            self._prompt_waiters.pop(prompt_id, None)
     
     async def health_check(self) -> bool:
         """
@@ -217,30 +378,41 @@ class ComfyUIService:
         if not self.client:
             raise RuntimeError("ComfyUI service not started")
         
+        # Pick the prompt ID ourselves so a completion waiter can be registered
+        # before ComfyUI starts emitting events for it
+        prompt_id = str(uuid.uuid4())
         payload = {
             "prompt": prompt,
-            "client_id": "felix"
+            "client_id": CLIENT_ID,
+            "prompt_id": prompt_id
         }
         
-        response = await self.client.post("/prompt", json=payload)
-        response.raise_for_status()
-        result = response.json()
+        if self._ws is not None:
+            self._prompt_waiters[prompt_id] = asyncio.get_running_loop().create_future()
+        
+        try:
+            response = await self.client.post("/prompt", json=payload)
+            response.raise_for_status()
+        except Exception:
+            self._prompt_waiters.pop(prompt_id, None)
+            raise
         
-        prompt_id = result.get("prompt_id")
         logger.info("prompt_queued", prompt_id=prompt_id)
         return prompt_id
     
-    async def get_image(self, filename: str, subfolder: str = "", folder_type: str = "output") -> bytes:
+    async def stream_image(self, filename: str, subfolder: str = "", folder_type: str = "output",
+                           chunk_size: int = 65536) -> AsyncIterator[bytes]:
         """
-        Get generated image
+        Stream a generated image without buffering it in memory
         
         Args:
             filename: Image filename
             subfolder: Subfolder within folder_type
             folder_type: Type of folder (output, input, temp)
+            chunk_size: Maximum bytes per yielded chunk
             
-        Returns:
-            Image bytes
+        Yields:
+            Image bytes, chunk by chunk
         """
         if not self.client:
             raise RuntimeError("ComfyUI service not started")
@@ -252,9 +424,26 @@ class ComfyUIService:
         if subfolder:
             params["subfolder"] = subfolder
         
-        response = await self.client.get("/view", params=params)
-        response.raise_for_status()
-        return response.content
+        async with self.client.stream("GET", "/view", params=params) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(chunk_size):
+                yield chunk
+    
+    async def get_image(self, filename: str, subfolder: str = "", folder_type: str = "output") -> bytes:
+        """
+        Get generated image
+        
+        Prefer stream_image() when the bytes are forwarded elsewhere.
+        
+        Args:
+            filename: Image filename
+            subfolder: Subfolder within folder_type
+            folder_type: Type of folder (output, input, temp)
+            
+        Returns:
+            Image bytes
+        """
+        return b"".join([chunk async for chunk in self.stream_image(filename, subfolder, folder_type)])
     
     async def interrupt(self):
         """Interrupt current execution"""
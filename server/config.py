@@ -62,6 +62,18 @@ class Settings(BaseSettings):
         default="",
         description="Comma-separated builtin tool module names to skip (e.g. 'music_tools,memory_tools')",
     )
+    eager_tool_import: bool = Field(
+        default=False,
+        description="Import all builtin tool modules at startup instead of when the tool registry is first used",
+    )
+    memory_ann_index: bool = Field(
+        default=False,
+        description="Serve memory recall from a FAISS HNSW index over memory embeddings (requires faiss-cpu)",
+    )
+    memory_ann_dtype: Literal["float32", "int8"] = Field(
+        default="float32",
+        description="Vector storage for the memory ANN index: float32 or int8 (4x smaller, slightly less precise)",
+    )
     enabled_tool_packs: str = Field(
         default="",
         description="Comma-separated tool pack module names to load from server.tools.packs (e.g. 'flyouts_demo')",
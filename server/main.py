@@ -4,6 +4,7 @@ Runs on CPU by default; can use GPU acceleration when available.
 """
 import asyncio
 import json
+import sys
 import base64
 from pathlib import Path
 from typing import Optional
@@ -15,12 +16,13 @@ from fastapi.responses import FileResponse
 import structlog
 
 from .config import settings
-from .session import Session, SessionState
+from .session import Session, SessionState, current_session
 from .audio.vad import create_vad, SileroVAD
 from .stt import get_stt, get_active_stt_backend
 from .llm.ollama import get_llm_client, list_models_for_backend
 from .tts.piper_tts import get_tts, list_voices  # Piper local TTS
 from .tools import tool_registry, tool_executor
+from .tools import builtin as builtin_tools
 from .tracing import init_tracing, get_tracer, start_stt_span, start_llm_span, start_tool_span, start_tts_span
 from .comfy_service import initialize_comfy_service, shutdown_comfy_service, get_comfy_service
 
@@ -43,6 +45,18 @@ structlog.configure(
 logger = structlog.get_logger()
 
 
+async def _warm_memory() -> None:
+    """Import memory_tools (if enabled) and warm up OpenMemory."""
+    try:
+        # Importing the SDK is slow; keep it off the event loop
+        memory_tools = await asyncio.to_thread(getattr, builtin_tools, "memory_tools")
+    except Exception as e:
+        logger.warning("memory_tools_import_failed", error=str(e))
+        return
+    if memory_tools is not None:
+        await memory_tools.warm_memory()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifecycle management."""
@@ -59,9 +73,8 @@ async def lifespan(app: FastAPI):
     voices = list_voices()
     logger.info("Piper ready", voices=[v["id"] for v in voices])
     
-    # Log registered tools
-    tools = tool_registry.list_tools()
-    logger.info("Registered tools", count=len(tools), tools=[t.name for t in tools])
+    # Warm up long-term memory in the background, off the first request's path
+    memory_warmup = asyncio.create_task(_warm_memory())
     
     # Initialize OpenTelemetry tracing
     logger.info("Initializing tracing...")
@@ -79,6 +92,13 @@ async def lifespan(app: FastAPI):
     
     logger.info("Shutting down Voice Agent server...")
     
+    if not memory_warmup.done():
+        memory_warmup.cancel()
+    # Only if it was loaded: looking it up on the package would import it
+    memory_tools = sys.modules.get(f"{builtin_tools.__name__}.memory_tools")
+    if memory_tools is not None:
+        await memory_tools.close_memory()
+    
     # Shutdown ComfyUI service
     if comfy_service:
         logger.info("Shutting down ComfyUI service...")
@@ -159,7 +179,7 @@ async def health():
         "stt": stt_backend,
         "tts": tts_backend,
         "llm": llm_backend,
-        "tools_registered": len(tool_registry.list_tools()),
+        "tools_registered": tool_registry.registered_count(),
         "comfyui": comfy_status,
     }
 
@@ -764,6 +784,9 @@ async def websocket_endpoint(websocket: WebSocket):
     
     await manager.connect(websocket, client_id)
     
+    # Pipeline tasks spawned below inherit this, scoping tool state to the connection
+    current_session.set(manager.get_session(client_id))
+    
     # Client settings (read from actual settings)
     voice = settings.tts_voice if hasattr(settings, 'tts_voice') else 'amy'
     model = settings.ollama_model  # Read from .env properly
@@ -4,8 +4,10 @@ Handles the state machine for voice conversations.
 """
 import asyncio
 import time
+from contextvars import ContextVar
 from enum import Enum, auto
 from dataclasses import dataclass, field
+from typing import Optional
 import structlog
 
 from .llm.conversation import ConversationHistory
@@ -45,6 +47,9 @@ class Session:
     # Timing
     last_activity: float = field(default_factory=time.time)
     
+    # Per-session state owned by tools (keyed by tool module)
+    tool_state: dict = field(default_factory=dict)
+    
     def set_state(self, new_state: SessionState) -> None:
         """Update session state."""
         old_state = self.state
@@ -67,3 +72,8 @@ class Session:
     def reset_stop_flag(self) -> None:
         """Reset the stop flag."""
         self._stop_requested = False
+
+
+# Session served by the current task; set per WebSocket connection so tools
+# (which run in tasks spawned from it) can keep per-session state
+current_session: ContextVar[Optional[Session]] = ContextVar("current_session", default=None)
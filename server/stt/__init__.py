@@ -8,7 +8,8 @@ If `STT_BACKEND=whisper-cpp` is selected but whisper.cpp isn’t available,
 this module automatically falls back to `faster-whisper` so the app remains usable.
 """
 
-from typing import Any
+import functools
+from typing import Any, Callable
 
 import structlog
 
@@ -24,58 +25,91 @@ def get_active_stt_backend() -> str:
 	return _active_backend
 
 
-async def _get_faster_whisper_stt() -> Any:
-	global _active_backend
+def _log_fallback(error: Exception) -> None:
+	logger.warning(
+		"stt_backend_fallback",
+		requested_backend="whisper-cpp",
+		fallback_backend="faster-whisper",
+		error=str(error),
+	)
+
+
+@functools.lru_cache(maxsize=1)
+def _faster_whisper_backend() -> tuple[str, Callable, Callable]:
 	from .whisper import get_stt as get_faster_whisper_stt
+	from .whisper import transcribe_audio as faster_whisper_transcribe
 
-	_active_backend = "faster-whisper"
-	return await get_faster_whisper_stt()
+	return "faster-whisper", get_faster_whisper_stt, faster_whisper_transcribe
 
 
-async def get_stt() -> Any:
-	"""Get the configured STT backend instance (with safe fallback)."""
+@functools.lru_cache(maxsize=1)
+def _resolve_backend(requested: str) -> tuple[str, Callable, Callable]:
+	"""Resolve `(name, get_stt, transcribe_audio)` for the requested backend once.
+
+	Keyed on the requested backend, so changing `settings.stt_backend` at runtime
+	re-resolves; `_resolve_backend.cache_clear()` forces it explicitly.
+	"""
 	global _active_backend
 
-	if settings.stt_backend == "whisper-cpp":
+	backend = None
+	if requested == "whisper-cpp":
 		try:
 			from .whisper_cpp import get_stt as get_whisper_cpp_stt
+			from .whisper_cpp import transcribe_audio as whisper_cpp_transcribe
 
-			stt = await get_whisper_cpp_stt()
-			_active_backend = "whisper-cpp"
-			return stt
+			backend = ("whisper-cpp", get_whisper_cpp_stt, whisper_cpp_transcribe)
 		except Exception as e:
-			logger.warning(
-				"stt_backend_fallback",
-				requested_backend="whisper-cpp",
-				fallback_backend="faster-whisper",
-				error=str(e),
-			)
-			return await _get_faster_whisper_stt()
+			_log_fallback(e)
 
-	return await _get_faster_whisper_stt()
+	if backend is None:
+		backend = _faster_whisper_backend()
 
+	_active_backend = backend[0]
+	return backend
 
-async def transcribe_audio(audio_data: bytes, sample_rate: int = 16000) -> str:
-	"""Convenience transcription function routed by backend (with safe fallback)."""
+
+def _runtime_fallback(error: Exception) -> tuple[str, Callable, Callable]:
+	"""Switch to faster-whisper after whisper.cpp failed at call time."""
 	global _active_backend
-	if settings.stt_backend == "whisper-cpp":
-		try:
-			from .whisper_cpp import transcribe_audio as whisper_cpp_transcribe
 
-			_active_backend = "whisper-cpp"
-			return await whisper_cpp_transcribe(audio_data, sample_rate=sample_rate)
-		except Exception as e:
-			logger.warning(
-				"stt_backend_fallback",
-				requested_backend="whisper-cpp",
-				fallback_backend="faster-whisper",
-				error=str(e),
-			)
+	_log_fallback(error)
+	_active_backend = "faster-whisper"
+	return _faster_whisper_backend()
 
-	from .whisper import transcribe_audio as faster_whisper_transcribe
 
-	_active_backend = "faster-whisper"
-	return await faster_whisper_transcribe(audio_data)
+async def get_stt() -> Any:
+	"""Get the configured STT backend instance (with safe fallback)."""
+	global _active_backend
+
+	name, get_backend_stt, _ = _resolve_backend(settings.stt_backend)
+	if name == "faster-whisper":
+		return await get_backend_stt()
+
+	try:
+		stt = await get_backend_stt()
+	except Exception as e:
+		_, get_fallback_stt, _ = _runtime_fallback(e)
+		return await get_fallback_stt()
+	# A runtime fallback isn't sticky: report whisper.cpp again once it works
+	_active_backend = name
+	return stt
+
+
+async def transcribe_audio(audio_data: bytes, sample_rate: int = 16000) -> str:
+	"""Convenience transcription function routed by backend (with safe fallback)."""
+	global _active_backend
+
+	name, _, backend_transcribe = _resolve_backend(settings.stt_backend)
+	if name == "faster-whisper":
+		return await backend_transcribe(audio_data)
+
+	try:
+		text = await backend_transcribe(audio_data, sample_rate=sample_rate)
+	except Exception as e:
+		_, _, fallback_transcribe = _runtime_fallback(e)
+		return await fallback_transcribe(audio_data)
+	_active_backend = name
+	return text
 
 
 __all__ = ["get_stt", "transcribe_audio", "get_active_stt_backend"]
@@ -1,54 +1,81 @@
 """
 Built-in tools package.
-Import all tools to register them with the tool registry.
+
+Tool modules register their tools with the tool registry when imported. They
+are imported lazily: on first attribute access (PEP 562 `__getattr__`) or all
+at once by `register_all_tools()`, which runs the first time the tool registry
+is consulted (or at import when `settings.eager_tool_import` is set).
 """
 
 from __future__ import annotations
 
 import importlib
+import sys
 
 
 from ...config import settings
+from ..registry import tool_registry
 
 
-def _parse_csv(value: str) -> set[str]:
-    return {item.strip() for item in (value or "").split(",") if item.strip()}
+def _parse_csv(value: str) -> frozenset[str]:
+    return frozenset(item.strip() for item in (value or "").split(",") if item.strip())
 
 
 _DISABLED = _parse_csv(getattr(settings, "disabled_tool_modules", ""))
+_PREFIX = f"{__name__}."
+_imp = importlib.import_module
+
+# Core tool modules (expected to have no optional deps)
+_CORE_MODULES = (
+    "datetime_tools",
+    "weather_tools",
+    "web_tools",
+    "system_tools",
+    "knowledge_tools",
+    "help_tools",
+    "onboarding_tools",
+    "image_tools",
+)
+
+# Optional-dependency modules, mapped to the package whose absence disables them
+_OPTIONAL_MODULES = {
+    "memory_tools": "openmemory",
+    "music_tools": "mpd",
+}
+
+_LAZY = _CORE_MODULES + tuple(_OPTIONAL_MODULES)
 
 
 def _import_tool_module(module_name: str):
     if module_name in _DISABLED:
         return None
-    return importlib.import_module(f"{__name__}.{module_name}")
+    try:
+        return _imp(_PREFIX + module_name)
+    except ModuleNotFoundError as e:
+        if getattr(e, "name", None) != _OPTIONAL_MODULES.get(module_name):
+            raise
+        return None
 
 
-# Core tool modules (expected to have no optional deps)
-datetime_tools = _import_tool_module("datetime_tools")
-weather_tools = _import_tool_module("weather_tools")
-web_tools = _import_tool_module("web_tools")
-system_tools = _import_tool_module("system_tools")
-knowledge_tools = _import_tool_module("knowledge_tools")
-help_tools = _import_tool_module("help_tools")
-onboarding_tools = _import_tool_module("onboarding_tools")
-image_tools = _import_tool_module("image_tools")
-
-
-# Optional-dependency modules
-try:
-    memory_tools = _import_tool_module("memory_tools")
-except ModuleNotFoundError as e:
-    if getattr(e, "name", None) != "openmemory":
-        raise
-    memory_tools = None
-
-try:
-    music_tools = _import_tool_module("music_tools")
-except ModuleNotFoundError as e:
-    if getattr(e, "name", None) != "mpd":
-        raise
-    music_tools = None
+def __getattr__(name: str):
+    if name in _LAZY:
+        module = _import_tool_module(name)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def register_all_tools() -> None:
+    """Import every enabled tool module so its tools are registered."""
+    package = sys.modules[__name__]
+    for module_name in _LAZY:
+        getattr(package, module_name)
+
+
+if settings.eager_tool_import:
+    register_all_tools()
+else:
+    tool_registry.add_loader(register_all_tools)
 
 __all__ = [
     "datetime_tools",
@@ -61,4 +88,5 @@ __all__ = [
     "music_tools",
     "onboarding_tools",
     "image_tools",
+    "register_all_tools",
 ]
@@ -5,6 +5,7 @@ Provides text-to-image, image-to-image, and other AI image generation capabiliti
 
 import asyncio
 import base64
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
 import structlog
@@ -14,66 +15,173 @@ from ...comfy_service import get_comfy_service
 
 logger = structlog.get_logger(__name__)
 
-# Default workflow for text-to-image (Stable Diffusion 1.5 format)
-DEFAULT_TEXT2IMG_WORKFLOW = {
-    "3": {
-        "inputs": {
-            "seed": 0,
-            "steps": 20,
-            "cfg": 7.0,
-            "sampler_name": "euler",
-            "scheduler": "normal",
-            "denoise": 1.0,
-            "model": ["4", 0],
-            "positive": ["6", 0],
-            "negative": ["7", 0],
-            "latent_image": ["5", 0]
-        },
-        "class_type": "KSampler"
-    },
-    "4": {
-        "inputs": {
-            "ckpt_name": "v1-5-pruned.safetensors"
+# Request coalescing: identical generate_image calls that arrive within
+# _BATCH_WINDOW seconds share one ComfyUI submission with batch_size=N
+_BATCH_MAX = 4
+_BATCH_WINDOW = 0.05
+_GENERATION_TIMEOUT = 120  # 2 minutes max per submission
+
+
+def _build_t2i_workflow(
+    prompt: str,
+    negative: str,
+    width: int,
+    height: int,
+    steps: int,
+    cfg: float,
+    seed: int,
+    batch_size: int = 1
+) -> dict:
+    """
+    Build a text-to-image workflow (Stable Diffusion 1.5 format).
+    
+    Returns a freshly constructed dict on every call, so concurrent
+    generations never share (or mutate) nested node inputs.
+    """
+    return {
+        "3": {
+            "inputs": {
+                "seed": seed,
+                "steps": steps,
+                "cfg": cfg,
+                "sampler_name": "euler",
+                "scheduler": "normal",
+                "denoise": 1.0,
+                "model": ["4", 0],
+                "positive": ["6", 0],
+                "negative": ["7", 0],
+                "latent_image": ["5", 0]
+            },
+            "class_type": "KSampler"
         },
-        "class_type": "CheckpointLoaderSimple"
-    },
-    "5": {
-        "inputs": {
-            "width": 512,
-            "height": 512,
-            "batch_size": 1
+        "4": {
+            "inputs": {
+                "ckpt_name": "v1-5-pruned.safetensors"
+            },
+            "class_type": "CheckpointLoaderSimple"
         },
-        "class_type": "EmptyLatentImage"
-    },
-    "6": {
-        "inputs": {
-            "text": "",
-            "clip": ["4", 1]
+        "5": {
+            "inputs": {
+                "width": width,
+                "height": height,
+                "batch_size": batch_size
+            },
+            "class_type": "EmptyLatentImage"
         },
-        "class_type": "CLIPTextEncode"
-    },
-    "7": {
-        "inputs": {
-            "text": "text, watermark",
-            "clip": ["4", 1]
+        "6": {
+            "inputs": {
+                "text": prompt,
+                "clip": ["4", 1]
+            },
+            "class_type": "CLIPTextEncode"
         },
-        "class_type": "CLIPTextEncode"
-    },
-    "8": {
-        "inputs": {
-            "samples": ["3", 0],
-            "vae": ["4", 2]
+        "7": {
+            "inputs": {
+                "text": negative,
+                "clip": ["4", 1]
+            },
+            "class_type": "CLIPTextEncode"
         },
-        "class_type": "VAEDecode"
-    },
-    "9": {
-        "inputs": {
-            "filename_prefix": "felix_gen",
-            "images": ["8", 0]
+        "8": {
+            "inputs": {
+                "samples": ["3", 0],
+                "vae": ["4", 2]
+            },
+            "class_type": "VAEDecode"
         },
-        "class_type": "SaveImage"
+        "9": {
+            "inputs": {
+                "filename_prefix": "felix_gen",
+                "images": ["8", 0]
+            },
+            "class_type": "SaveImage"
+        }
     }
-}
+
+
+@dataclass
+class _ImageRequest:
+    """A pending generate_image call waiting to be batched."""
+    params: tuple  # (prompt, negative, width, height, steps, cfg)
+    future: asyncio.Future
+
+
+_request_queue: Optional[asyncio.Queue] = None
+_batcher_task: Optional[asyncio.Task] = None
+_batch_tasks: set = set()
+
+
+def _get_request_queue() -> asyncio.Queue:
+    """Get the request queue, (re)starting the batcher task on this loop if needed."""
+    global _request_queue, _batcher_task
+    loop = asyncio.get_running_loop()
+    if _batcher_task is None or _batcher_task.done() or _batcher_task.get_loop() is not loop:
+        _request_queue = asyncio.Queue()
+        _batcher_task = loop.create_task(_batcher(_request_queue))
+    return _request_queue
+
+
+async def _batcher(queue: asyncio.Queue):
+    """Collect queued requests into batches and submit one workflow per group."""
+    while True:
+        batch = [await queue.get()]
+        
+        # Give concurrent callers a short window to join this batch
+        await asyncio.sleep(_BATCH_WINDOW)
+        while len(batch) < _BATCH_MAX and not queue.empty():
+            batch.append(queue.get_nowait())
+        
+        groups: dict[tuple, list[asyncio.Future]] = {}
+        for request in batch:
+            groups.setdefault(request.params, []).append(request.future)
+        
+        for params, futures in groups.items():
+            task = asyncio.create_task(_run_batch(params, futures))
+            _batch_tasks.add(task)
+            task.add_done_callback(_batch_tasks.discard)
+
+
+async def _run_batch(params: tuple, futures: list[asyncio.Future]):
+    """Run one batched workflow and hand each caller its own output image."""
+    try:
+        service = get_comfy_service()
+        if not service:
+            raise RuntimeError("ComfyUI service is not initialized")
+        
+        workflow = _build_t2i_workflow(
+            *params,
+            seed=-1,  # Random seed
+            batch_size=len(futures)
+        )
+        
+        logger.info("queueing_image_generation", prompt=params[0][:50], batch_size=len(futures))
+        
+        # Subscribe to execution events before queueing so completion is pushed
+        await service.connect_ws()
+        prompt_id = await service.queue_prompt(workflow)
+        await service.wait_for_prompt(prompt_id, timeout=_GENERATION_TIMEOUT)
+        
+        # Get the images from SaveImage node (node 9)
+        history = await service.get_history(prompt_id)
+        outputs = history.get(prompt_id, {}).get("outputs", {})
+        images = outputs.get("9", {}).get("images", [])
+        
+        for future, img_info in zip(futures, images):
+            if not future.done():
+                future.set_result(img_info)
+        
+        error = RuntimeError("generation finished but no image was produced")
+        for future in futures[len(images):]:
+            if not future.done():
+                future.set_exception(error)
+    except asyncio.CancelledError:
+        for future in futures:
+            future.cancel()
+        raise
+    except Exception as e:
+        for future in futures:
+            if not future.done():
+                future.set_exception(e)
 
 
 @tool_registry.register(
@@ -108,62 +216,31 @@ async def generate_image(
         return "❌ Image generation is not available. ComfyUI service is not initialized."
     
     # Start ComfyUI if not running
-    if not service.is_running:
-        logger.info("starting_comfyui_for_generation")
-        started = await service.start()
-        if not started:
-            return "❌ Failed to start image generation service. Please check ComfyUI installation."
+    if not await service.ensure_started():
+        return "❌ Failed to start image generation service. Please check ComfyUI installation."
     
     try:
-        # Create workflow from template
-        workflow = DEFAULT_TEXT2IMG_WORKFLOW.copy()
+        # Hand the request to the batcher; identical concurrent requests share a submission
+        future = asyncio.get_running_loop().create_future()
+        params = (prompt, negative_prompt, width, height, steps, cfg_scale)
+        await _get_request_queue().put(_ImageRequest(params, future))
         
-        # Update parameters
-        workflow["6"]["inputs"]["text"] = prompt
-        workflow["7"]["inputs"]["text"] = negative_prompt
-        workflow["5"]["inputs"]["width"] = width
-        workflow["5"]["inputs"]["height"] = height
-        workflow["3"]["inputs"]["steps"] = steps
-        workflow["3"]["inputs"]["cfg"] = cfg_scale
-        workflow["3"]["inputs"]["seed"] = -1  # Random seed
+        try:
+            img_info = await future
+        except asyncio.TimeoutError:
+            return "⏱️ Image generation timed out. The image may still be processing."
         
-        logger.info("queueing_image_generation", prompt=prompt[:50])
-        
-        # Queue the prompt
-        prompt_id = await service.queue_prompt(workflow)
+        filename = img_info["filename"]
+        subfolder = img_info.get("subfolder", "")
         
-        # Wait for completion (poll history)
-        max_wait = 120  # 2 minutes max
-        waited = 0
+        logger.info("image_generated", filename=filename)
         
-        while waited < max_wait:
-            await asyncio.sleep(2)
-            waited += 2
-            
-            history = await service.get_history(prompt_id)
-            if prompt_id in history:
-                result = history[prompt_id]
-                
-                # Check if completed
-                if "outputs" in result:
-                    # Get the image from SaveImage node (node 9)
-                    if "9" in result["outputs"]:
-                        images = result["outputs"]["9"].get("images", [])
-                        if images:
-                            img_info = images[0]
-                            filename = img_info["filename"]
-                            subfolder = img_info.get("subfolder", "")
-                            
-                            logger.info("image_generated", filename=filename)
-                            
-                            # Return the image path info
-                            image_url = f"{service.base_url}/view?filename={filename}&type=output"
-                            if subfolder:
-                                image_url += f"&subfolder={subfolder}"
-                            
-                            return f"✅ Image generated successfully!\n\nPrompt: {prompt}\n\n**View image**: {image_url}\n\n_(Image saved as: {filename})_"
+        # Return the image path info
+        image_url = f"{service.base_url}/view?filename={filename}&type=output"
+        if subfolder:
+            image_url += f"&subfolder={subfolder}"
         
-        return "⏱️ Image generation timed out. The image may still be processing."
+        return f"✅ Image generated successfully!\n\nPrompt: {prompt}\n\n**View image**: {image_url}\n\n_(Image saved as: {filename})_"
         
     except Exception as e:
         logger.error("image_generation_error", error=str(e))
@@ -0,0 +1,38 @@
+"""
+Configuration and helpers shared by the OpenMemory tool modules.
+
+Registers no tools, so memory_tools and memory_tools_old can both import it.
+"""
+
+from pathlib import Path
+from typing import Optional
+
+# OpenMemory configuration
+MEMORY_DB_PATH = Path(__file__).parent.parent.parent.parent / "data" / "memory.db"
+MEMORY_TIER = "smart"
+EMBEDDINGS_CONFIG = {
+    "provider": "ollama",
+    "ollama": {"url": "http://localhost:11434"},
+    "model": "nomic-embed-text"
+}
+
+# Importance level -> salience (0-1 scale)
+SALIENCE_MAP = {"low": 0.3, "normal": 0.5, "high": 0.8}
+
+# Most memories memory_status lists
+STATUS_LIMIT = 50
+
+
+def parse_tags(tags: Optional[str]) -> list[str]:
+    """Split a comma-separated tag string (single tags skip the split)."""
+    if not tags:
+        return []
+    if "," not in tags:
+        return [tags.strip()]
+    return [t.strip() for t in tags.split(",")]
+
+
+def list_memories(memory, limit: int, sector: Optional[str] = None) -> list[dict]:
+    """List stored memories (at most STATUS_LIMIT), optionally from one sector."""
+    # The SDK applies the limit in its SQLite query
+    return memory.getAll(limit=min(limit, STATUS_LIMIT), sector=sector)
@@ -0,0 +1,302 @@
+"""
+Approximate nearest-neighbour index for long-term memory recall.
+
+OpenMemory's local query scores every stored memory, so recall latency grows
+with the size of memory.db. When `MEMORY_ANN_INDEX=true`, recall instead
+embeds the query with the same Ollama model and searches a FAISS HNSW index
+built over the stored memories (cosine similarity via normalized inner
+product). With `MEMORY_ANN_DTYPE=int8` the index stores vectors with 8-bit
+scalar quantization: 4x less memory than float32, at a small recall cost.
+
+The index is saved next to memory.db and memory-mapped on startup, so boot
+time doesn't depend on how many memories are stored.
+
+Requires faiss-cpu and numpy; without them recall keeps using the SDK query.
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+import httpx
+import structlog
+
+try:
+    import orjson
+    _loads, _dumps = orjson.loads, orjson.dumps
+except ImportError:
+    _loads = json.loads
+    
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+logger = structlog.get_logger(__name__)
+
+# HNSW graph parameters
+HNSW_M = 24
+HNSW_EF_CONSTRUCTION = 128
+HNSW_EF_SEARCH = 100
+
+# Fewest vectors used to train int8 per-dimension ranges from the data itself
+_MIN_TRAIN = 256
+
+# Bump when the saved index layout changes
+_FORMAT_VERSION = 1
+
+# Texts per Ollama /api/embed request
+_EMBED_BATCH = 64
+
+# Lazy-loaded dependencies
+_faiss = None
+_np = None
+
+
+def _ensure_dependencies():
+    """Lazy load FAISS and numpy."""
+    global _faiss, _np
+    
+    if _faiss is None:
+        try:
+            import faiss
+            _faiss = faiss
+        except ImportError:
+            raise RuntimeError(
+                "faiss-cpu is not installed. Run: pip install faiss-cpu"
+            )
+    
+    if _np is None:
+        import numpy
+        _np = numpy
+    
+    return _faiss, _np
+
+
+def _meta_path(path: Path) -> Path:
+    return path.with_name(path.name + ".json")
+
+
+class MemoryIndex:
+    """
+    HNSW index over memory embeddings, keyed by OpenMemory memory ID.
+    
+    FAISS HNSW indexes can't delete vectors, so forgotten memories are
+    tombstoned and filtered out of results until the next rebuild.
+    Thread-safe; meant to be used from the memory thread pool.
+    """
+    
+    def __init__(self, ollama_url: str, model: str, dtype: str = "float32"):
+        _ensure_dependencies()
+        if dtype not in ("float32", "int8"):
+            raise ValueError(f"Unsupported index dtype: {dtype}")
+        self.model = model
+        self.dtype = dtype
+        self._client = httpx.Client(base_url=ollama_url, timeout=30.0)
+        self._lock = threading.Lock()
+        self._index = None
+        # FAISS label -> {"id", "content", "sectors"}, None once forgotten
+        self._entries: list[Optional[dict]] = []
+        self._labels: dict[str, int] = {}
+        self._tombstones = 0
+        # Loaded index still backed by the file mapping (read-only)
+        self._mapped = False
+        self._dirty = False
+    
+    @property
+    def stale(self) -> bool:
+        """True when enough entries were forgotten that a rebuild pays off."""
+        return self._tombstones > max(64, len(self._entries) // 4)
+    
+    @property
+    def dirty(self) -> bool:
+        """True when the index changed since it was last saved or loaded."""
+        return self._dirty
+    
+    def _header(self, dim: int) -> dict:
+        return {
+            "version": _FORMAT_VERSION,
+            "model": self.model,
+            "dtype": self.dtype,
+            "metric": "inner_product",
+            "M": HNSW_M,
+            "dim": dim,
+        }
+    
+    def _embed(self, texts: list[str]):
+        """Embed texts with Ollama and L2-normalize them for cosine search."""
+        faiss, np = _ensure_dependencies()
+        vectors = []
+        for start in range(0, len(texts), _EMBED_BATCH):
+            response = self._client.post(
+                "/api/embed",
+                json={"model": self.model, "input": texts[start:start + _EMBED_BATCH]},
+            )
+            response.raise_for_status()
+            vectors.extend(response.json()["embeddings"])
+        
+        matrix = np.asarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(matrix)
+        return matrix
+    
+    def _new_index(self, vectors):
+        """Create an empty index sized for (and, for int8, trained on) vectors."""
+        faiss, np = _ensure_dependencies()
+        dim = vectors.shape[1]
+        
+        if self.dtype == "int8":
+            index = faiss.IndexHNSWSQ(dim, faiss.ScalarQuantizer.QT_8bit, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+            # Too few vectors to estimate per-dimension ranges: use the full
+            # [-1, 1] range of normalized components instead
+            if len(vectors) < _MIN_TRAIN:
+                vectors = np.stack([np.full(dim, -1.0, np.float32), np.full(dim, 1.0, np.float32)])
+            index.train(vectors)
+        else:
+            index = faiss.IndexHNSWFlat(dim, HNSW_M, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        return index
+    
+    @staticmethod
+    def _entry(mem: dict) -> dict:
+        return {
+            "id": mem["id"],
+            "content": mem.get("content", ""),
+            "sectors": mem.get("sectors") or [mem.get("primarySector", "unknown")],
+        }
+    
+    def build(self, memories: list[dict]) -> None:
+        """Replace the index contents with the given SDK memory records."""
+        entries = [self._entry(m) for m in memories if m.get("id")]
+        vectors = self._embed([e["content"] for e in entries]) if entries else None
+        
+        with self._lock:
+            self._index = self._new_index(vectors) if vectors is not None else None
+            if vectors is not None:
+                self._index.add(vectors)
+            self._entries = entries
+            self._labels = {e["id"]: label for label, e in enumerate(entries)}
+            self._tombstones = 0
+            self._mapped = False
+            self._dirty = True
+        
+        logger.info("memory_index_built", count=len(entries))
+    
+    def add(self, memories: list[dict]) -> None:
+        """Index newly stored memories (SDK records with content filled in)."""
+        # Already-indexed IDs are skipped, so replaying an add is harmless
+        entries = [self._entry(m) for m in memories if m.get("id") and m["id"] not in self._labels]
+        if not entries:
+            return
+        vectors = self._embed([e["content"] for e in entries])
+        
+        with self._lock:
+            if self._index is None:
+                self._index = self._new_index(vectors)
+            elif self._mapped:
+                # Mapped storage can't grow: copy into owned memory first
+                faiss, _ = _ensure_dependencies()
+                self._index = faiss.deserialize_index(faiss.serialize_index(self._index))
+                self._index.hnsw.efSearch = HNSW_EF_SEARCH
+                self._mapped = False
+            self._index.add(vectors)
+            self._dirty = True
+            for entry in entries:
+                self._labels[entry["id"]] = len(self._entries)
+                self._entries.append(entry)
+    
+    def remove(self, memory_id: str) -> None:
+        """Tombstone a forgotten memory."""
+        with self._lock:
+            label = self._labels.pop(memory_id, None)
+            if label is not None:
+                self._entries[label] = None
+                self._tombstones += 1
+                self._dirty = True
+    
+    def save(self, path: Path) -> None:
+        """Write the index and its entry table next to each other, atomically."""
+        faiss, _ = _ensure_dependencies()
+        
+        with self._lock:
+            if self._index is None:
+                return
+            meta = {
+                "header": self._header(self._index.d),
+                "entries": self._entries,
+                "tombstones": self._tombstones,
+            }
+            # Write-then-rename keeps a mapped copy of the old file valid
+            tmp_index = path.with_name(path.name + ".tmp")
+            tmp_meta = _meta_path(tmp_index)
+            faiss.write_index(self._index, str(tmp_index))
+            tmp_meta.write_bytes(_dumps(meta))
+            os.replace(tmp_meta, _meta_path(path))
+            os.replace(tmp_index, path)
+            self._dirty = False
+        
+        logger.info("memory_index_saved", path=str(path), count=len(meta["entries"]))
+    
+    def load(self, path: Path, min_mtime: float = 0.0) -> bool:
+        """
+        Memory-map a saved index.
+        
+        Args:
+            path: Index file written by save()
+            min_mtime: Reject files older than this (e.g. memory.db's mtime)
+        
+        Returns:
+            False if the file is missing, outdated, or was built with
+            different settings (the caller should rebuild)
+        """
+        faiss, _ = _ensure_dependencies()
+        
+        try:
+            if path.stat().st_mtime < min_mtime:
+                logger.info("memory_index_outdated", path=str(path))
+                return False
+            meta = _loads(_meta_path(path).read_bytes())
+            index = faiss.read_index(str(path), faiss.IO_FLAG_MMAP_IFC)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, RuntimeError) as e:
+            logger.warning("memory_index_load_failed", path=str(path), error=str(e))
+            return False
+        
+        entries = meta.get("entries", [])
+        if meta.get("header") != self._header(index.d) or index.ntotal != len(entries):
+            logger.info("memory_index_incompatible", path=str(path))
+            return False
+        
+        # Search-time parameters aren't part of the saved index
+        index.hnsw.efSearch = HNSW_EF_SEARCH
+        with self._lock:
+            self._index = index
+            self._entries = entries
+            self._labels = {e["id"]: label for label, e in enumerate(entries) if e is not None}
+            self._tombstones = meta.get("tombstones", 0)
+            self._mapped = True
+            self._dirty = False
+        
+        logger.info("memory_index_loaded", path=str(path), count=len(self._labels))
+        return True
+    
+    def search(self, query: str, k: int) -> list[dict]:
+        """Return up to k memories most similar to query, best first."""
+        if self._index is None:
+            return []
+        vector = self._embed([query])
+        
+        with self._lock:
+            # Over-fetch so tombstoned hits don't shrink the result set
+            scores, labels = self._index.search(vector, k + self._tombstones)
+            results: list[dict[str, Any]] = []
+            for score, label in zip(scores[0], labels[0]):
+                entry = self._entries[label] if label >= 0 else None
+                if entry is None:
+                    continue
+                results.append({**entry, "score": float(score)})
+                if len(results) == k:
+                    break
+        
+        return results
@@ -8,59 +8,251 @@ Uses local SQLite storage with Ollama embeddings (no external backend needed).
 
 import logging
 import asyncio
-from pathlib import Path
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from openmemory import OpenMemory
+from ...config import settings
 from ..registry import tool_registry
+from .memory_common import (
+    EMBEDDINGS_CONFIG,
+    MEMORY_DB_PATH,
+    MEMORY_TIER,
+    SALIENCE_MAP,
+    list_memories,
+    parse_tags,
+)
+from .memory_index import MemoryIndex
 
 logger = logging.getLogger(__name__)
 
-# OpenMemory configuration
-MEMORY_DB_PATH = Path(__file__).parent.parent.parent.parent / "data" / "memory.db"
-MEMORY_DB_PATH.parent.mkdir(exist_ok=True)
+# ANN recall index, persisted next to the database
+MEMORY_INDEX_PATH = MEMORY_DB_PATH.with_name(MEMORY_DB_PATH.name + ".hnsw")
+
+# Upper bound on memories loaded when (re)building the ANN recall index
+_INDEX_BUILD_LIMIT = 100_000
+
+# Seconds to wait before retrying a failed index build or rebuild
+_INDEX_RETRY_DELAY = 300.0
 
-# Lazy-loaded singleton
+# Lazy-loaded singletons
 _memory: Optional[OpenMemory] = None
+_index: Optional[MemoryIndex] = None
+_index_disabled = not settings.memory_ann_index
+_index_lock = threading.Lock()
+_index_retry_at = 0.0
+# Index writes made while a background rebuild runs (None when idle)
+_rebuild_log: Optional[list] = None
+
+# Dedicated, bounded pool for the blocking SDK (SQLite + Ollama embeddings),
+# so memory calls don't queue behind unrelated work on the default executor
+_MEM_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="openmem")
 
 
 def _get_memory() -> OpenMemory:
     """Get or create the OpenMemory instance."""
     global _memory
     if _memory is None:
+        MEMORY_DB_PATH.parent.mkdir(exist_ok=True)
         _memory = OpenMemory(
             mode="local",
             path=str(MEMORY_DB_PATH),
-            tier="smart",
-            embeddings={
-                "provider": "ollama",
-                "ollama": {"url": "http://localhost:11434"},
-                "model": "nomic-embed-text"
-            }
+            tier=MEMORY_TIER,
+            embeddings=EMBEDDINGS_CONFIG
         )
-        logger.info("openmemory_initialized", path=str(MEMORY_DB_PATH))
+        logger.info("openmemory_initialized: %s", MEMORY_DB_PATH)
     return _memory
 
 
+def _db_mtime() -> float:
+    """Last modification of the memory database (including its SQLite WAL)."""
+    wal = MEMORY_DB_PATH.with_name(MEMORY_DB_PATH.name + "-wal")
+    return max((p.stat().st_mtime for p in (MEMORY_DB_PATH, wal) if p.exists()), default=0.0)
+
+
+def _new_index() -> MemoryIndex:
+    return MemoryIndex(
+        EMBEDDINGS_CONFIG["ollama"]["url"],
+        EMBEDDINGS_CONFIG["model"],
+        dtype=settings.memory_ann_dtype,
+    )
+
+
+def _get_index() -> Optional[MemoryIndex]:
+    """Get the ANN recall index, loading or building it once; None if unavailable."""
+    global _index, _index_disabled, _index_retry_at
+    if _index_disabled:
+        return None
+    
+    if _index is None and time.monotonic() >= _index_retry_at:
+        with _index_lock:
+            if _index is None and time.monotonic() >= _index_retry_at:
+                try:
+                    index = _new_index()
+                except RuntimeError as e:
+                    logger.warning("memory_index_unavailable: %s", e)
+                    _index_disabled = True
+                    return None
+                try:
+                    # A saved index is only reused if no memories were written
+                    # after it was saved
+                    if not index.load(MEMORY_INDEX_PATH, min_mtime=_db_mtime()):
+                        index.build(_get_memory().getAll(limit=_INDEX_BUILD_LIMIT))
+                        index.save(MEMORY_INDEX_PATH)
+                except Exception as e:
+                    # Recall falls back to the SDK query until the retry delay passes
+                    logger.warning("memory_index_build_failed: %s", e)
+                    _index_retry_at = time.monotonic() + _INDEX_RETRY_DELAY
+                    return None
+                _index = index
+    
+    if _index is not None and _index.stale and time.monotonic() >= _index_retry_at:
+        _schedule_rebuild()
+    return _index
+
+
+def _schedule_rebuild() -> None:
+    """Start a background rebuild of a stale index unless one is running."""
+    global _rebuild_log
+    with _index_lock:
+        if _rebuild_log is not None:
+            return
+        _rebuild_log = []
+    _MEM_POOL.submit(_rebuild_index)
+
+
+def _log_write(op: str, arg) -> None:
+    """Record an index write so a running rebuild can replay it."""
+    with _index_lock:
+        if _rebuild_log is not None:
+            _rebuild_log.append((op, arg))
+
+
+def _rebuild_index() -> None:
+    """Build a fresh index off to the side; recall keeps using the old one meanwhile."""
+    global _index, _rebuild_log, _index_retry_at
+    try:
+        index = _new_index()
+        index.build(_get_memory().getAll(limit=_INDEX_BUILD_LIMIT))
+        # Replay writes made during the build; swap once none are left
+        while True:
+            with _index_lock:
+                ops, _rebuild_log = _rebuild_log, []
+                if not ops:
+                    _index, _rebuild_log = index, None
+                    break
+            for op, arg in ops:
+                if op == "add":
+                    index.add(arg)
+                else:
+                    index.remove(arg)
+        index.save(MEMORY_INDEX_PATH)
+    except Exception as e:
+        logger.warning("memory_index_rebuild_failed: %s", e)
+        with _index_lock:
+            _rebuild_log = None
+            _index_retry_at = time.monotonic() + _INDEX_RETRY_DELAY
+
+
+def _warm() -> None:
+    _get_memory()
+    _get_index()
+
+
+def _save_index() -> None:
+    if _index is not None and _index.dirty:
+        _index.save(MEMORY_INDEX_PATH)
+
+
+async def warm_memory() -> None:
+    """Create the OpenMemory instance ahead of the first memory tool call."""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_MEM_POOL, _warm)
+    except Exception as e:
+        # _get_memory() retries lazily on the next call
+        logger.warning("openmemory_warmup_failed: %s", e)
+
+
+async def close_memory() -> None:
+    """Save the ANN recall index if it changed, so the next start can map it."""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(_MEM_POOL, _save_index)
+    except Exception as e:
+        logger.warning("memory_index_save_failed: %s", e)
+
+
+def _add_many(memories: list[dict], salience: float) -> list[dict]:
+    memory = _get_memory()
+    results = [memory.add(m["content"], tags=m.get("tags", []), salience=salience) for m in memories]
+    
+    if _index is not None:
+        added = [{**r, "content": m["content"]} for m, r in zip(memories, results)]
+        _log_write("add", added)
+        try:
+            _index.add(added)
+        except Exception as e:
+            # Stored fine; the memory just won't be recalled via ANN until a rebuild
+            logger.warning("memory_index_add_failed: %s", e)
+    return results
+
+
+def _query(query: str, k: int) -> list[dict]:
+    index = _get_index()
+    if index is not None:
+        try:
+            return index.search(query, k)
+        except Exception as e:
+            logger.warning("memory_index_search_failed: %s", e)
+    return _get_memory().query(query, k=k)
+
+
+def _get_all(limit: int, sector: Optional[str]) -> list[dict]:
+    return list_memories(_get_memory(), limit, sector)
+
+
+def _delete(memory_id: str) -> None:
+    _get_memory().delete(memory_id)
+    if _index is not None:
+        _log_write("remove", memory_id)
+        _index.remove(memory_id)
+
+
+async def _recall(query: str, limit: int, min_relevance: float) -> list[dict]:
+    loop = asyncio.get_running_loop()
+    memories = await loop.run_in_executor(_MEM_POOL, _query, query, min(limit, 20))
+    return [m for m in memories if m.get("score", 0) >= min_relevance]
+
+
+async def recall_many(queries: list[str], limit: int = 5, min_relevance: float = 0.3) -> list[list[dict]]:
+    """Run several recall() lookups concurrently; results follow query order."""
+    return list(await asyncio.gather(*(_recall(q, limit, min_relevance) for q in queries)))
+
+
+async def store_many(memories: list[dict], salience: float = 0.5) -> list[dict]:
+    """Store several memories ({"content", "tags"}) in a single pool job."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_MEM_POOL, _add_many, memories, salience)
+
+
 @tool_registry.register(
     description="Remember something important. Store facts, preferences, personal details."
 )
 async def remember(content: str, tags: Optional[str] = None, importance: Optional[str] = "normal") -> str:
     """Store a memory."""
     try:
-        tag_list = [t.strip() for t in tags.split(",")] if tags else []
-        salience_map = {"low": 0.3, "normal": 0.5, "high": 0.8}
-        salience = salience_map.get(importance, 0.5)
+        tag_list = parse_tags(tags)
+        salience = SALIENCE_MAP.get(importance, 0.5)
         
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None, lambda: _get_memory().add(content, tags=tag_list, salience=salience)
-        )
+        result, = await store_many([{"content": content, "tags": tag_list}], salience=salience)
         
         mem_id = result.get("id", "unknown")[:8]
         sector = result.get("primarySector", "unknown")
         return f"Remembered: '{content}' ({sector}, ID: {mem_id})"
     except Exception as e:
-        logger.error("memory_store_failed", error=str(e))
+        logger.error("memory_store_failed: %s", e)
         return f"Failed to store memory: {str(e)}"
 
 
@@ -70,12 +262,7 @@ async def remember(content: str, tags: Optional[str] = None, importance: Optiona
 async def recall(query: str, limit: Optional[int] = 5, min_relevance: Optional[float] = 0.3) -> str:
     """Search for relevant memories."""
     try:
-        loop = asyncio.get_event_loop()
-        memories = await loop.run_in_executor(
-            None, lambda: _get_memory().query(query, k=min(limit, 20))
-        )
-        
-        memories = [m for m in memories if m.get("score", 0) >= min_relevance]
+        memories = await _recall(query, limit, min_relevance)
         
         if not memories:
             return f"No memories found for: '{query}'"
@@ -86,12 +273,11 @@ async def recall(query: str, limit: Optional[int] = 5, min_relevance: Optional[f
             score = mem.get("score", 0)
             sectors = ", ".join(mem.get("sectors", []))
             mem_id = mem.get("id", "?")[:8]
-            output_lines.append(f"\n{i}. [{sectors}] (score: {score:.2f}, id: {mem_id})")
-            output_lines.append(f"   {content}")
+            output_lines.append(f"\n{i}. [{sectors}] (score: {score:.2f}, id: {mem_id})\n   {content}")
         
         return "\n".join(output_lines)
     except Exception as e:
-        logger.error("memory_recall_failed", error=str(e))
+        logger.error("memory_recall_failed: %s", e)
         return f"Failed to recall: {str(e)}"
 
 
@@ -99,8 +285,8 @@ async def recall(query: str, limit: Optional[int] = 5, min_relevance: Optional[f
 async def forget(memory_id: str) -> str:
     """Delete a memory."""
     try:
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, lambda: _get_memory().delete(memory_id))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(_MEM_POOL, _delete, memory_id)
         return f"Memory {memory_id[:8]} forgotten."
     except Exception as e:
         return f"Failed to forget: {str(e)}"
@@ -110,17 +296,15 @@ async def forget(memory_id: str) -> str:
 async def memory_status(sector: Optional[str] = None, limit: Optional[int] = 10) -> str:
     """Get memory status."""
     try:
-        loop = asyncio.get_event_loop()
-        memories = await loop.run_in_executor(
-            None, lambda: _get_memory().getAll(limit=min(limit, 50), sector=sector)
-        )
+        loop = asyncio.get_running_loop()
+        memories = await loop.run_in_executor(_MEM_POOL, _get_all, limit, sector)
         
         output = ["📊 Memory System: Local SQLite + Ollama embeddings", f"   {len(memories)} memories\n"]
         
         if not memories:
             output.append("   (no memories stored)")
         else:
-            for mem in memories[:limit]:
+            for mem in memories:
                 content = mem.get("content", "")[:50]
                 sectors = mem.get("sectors", [])
                 s = sectors[0] if sectors else "?"
@@ -10,19 +10,30 @@ These tools provide Felix with persistent memory across conversations:
 Uses local SQLite storage with Ollama embeddings (no external backend needed).
 """
 
-import logging
 import asyncio
-from pathlib import Path
+from operator import itemgetter
 from typing import Optional
+
+import structlog
 from openmemory import OpenMemory
 from ..registry import tool_registry
+from .memory_common import (
+    EMBEDDINGS_CONFIG,
+    MEMORY_DB_PATH,
+    MEMORY_TIER,
+    SALIENCE_MAP,
+    list_memories,
+    parse_tags,
+)
 
-logger = logging.getLogger(__name__)
+logger = structlog.get_logger(__name__)
 
-# OpenMemory configuration
-MEMORY_DB_PATH = Path(__file__).parent.parent.parent.parent / "data" / "memory.db"
 MEMORY_DB_PATH.parent.mkdir(exist_ok=True)
 
+# Field order used by the result formatters (records come from _normalize)
+_RECALL_FIELDS = itemgetter("content", "score", "primary_sector", "salience", "id")
+_STATUS_FIELDS = itemgetter("content", "primary_sector", "salience", "id")
+
 # Lazy-loaded singleton
 _memory: Optional[OpenMemory] = None
 
@@ -34,19 +45,30 @@ def _get_memory() -> OpenMemory:
         _memory = OpenMemory(
             mode="local",
             path=str(MEMORY_DB_PATH),
-            tier="smart",
-            embeddings={
-                "provider": "ollama",
-                "ollama": {
-                    "url": "http://localhost:11434"
-                },
-                "model": "nomic-embed-text"
-            }
+            tier=MEMORY_TIER,
+            embeddings=EMBEDDINGS_CONFIG
         )
-        logger.info("openmemory_initialized", path=str(MEMORY_DB_PATH), tier="smart", provider="ollama")
+        logger.info("openmemory_initialized", path=str(MEMORY_DB_PATH), tier=MEMORY_TIER, provider=EMBEDDINGS_CONFIG["provider"])
     return _memory
 
 
+async def _run(fn, *args, **kwargs):
+    """Run a synchronous SDK call in the default executor."""
+    return await asyncio.get_running_loop().run_in_executor(None, lambda: fn(*args, **kwargs))
+
+
+def _normalize(mem: dict) -> dict:
+    """Map an SDK memory record onto the keys the formatters use."""
+    sectors = mem.get("sectors") or []
+    return {
+        "id": mem.get("id", "unknown"),
+        "content": mem.get("content", ""),
+        "score": mem.get("score", 0),
+        "salience": mem.get("salience", 0),
+        "primary_sector": mem.get("primarySector") or mem.get("primary_sector") or (sectors[0] if sectors else "unknown"),
+    }
+
+
 @tool_registry.register(
     description="Remember something important about the user or conversation. Use this to store facts, preferences, personal details, or anything you might need to recall later. Examples: 'User's name is Sarah', 'User prefers dark mode', 'User is working on a Django project'."
 )
@@ -67,19 +89,10 @@ async def remember(
         Confirmation that the memory was stored
     """
     try:
-        # Parse tags
-        tag_list = [t.strip() for t in tags.split(",")] if tags else []
-        
-        # Map importance to salience (0-1 scale)
-        salience_map = {"low": 0.3, "normal": 0.5, "high": 0.8}
-        salience = salience_map.get(importance, 0.5)
-        
-        # Run SDK call in executor (it's synchronous)
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(
-            None,
-            lambda: _get_memory().add(content, tags=tag_list, salience=salience)
-        )
+        tag_list = parse_tags(tags)
+        salience = SALIENCE_MAP.get(importance, 0.5)
+        
+        result = await _run(_get_memory().add, content, tags=tag_list, salience=salience)
         
         memory_id = result.get("id", "unknown")
         sector = result.get("primarySector", "unknown")
@@ -113,17 +126,10 @@ async def recall(
         Relevant memories with their content and metadata
     """
     try:
-        payload = {
-            "query": query,
-            "k": min(limit, 20),  # Cap at 20
-            "filters": {
-                "min_score": max(0.0, min(1.0, min_relevance))
-            }
-        }
+        min_score = max(0.0, min(1.0, min_relevance))
+        matches = await _run(_get_memory().query, query, k=min(limit, 20))  # Cap at 20
         
-        result = await _call_openmemory("/memory/query", method="POST", json_data=payload)
-        
-        memories = result.get("matches", [])
+        memories = [m for m in map(_normalize, matches) if m["score"] >= min_score]
         
         if not memories:
             logger.info("memory_recall_empty", query=query)
@@ -132,25 +138,14 @@ async def recall(
         # Format results
         output_lines = [f"Found {len(memories)} relevant memories:"]
         for i, mem in enumerate(memories, 1):
-            content = mem.get("content", "")
-            score = mem.get("score", 0)
-            sector = mem.get("primary_sector", "unknown")
-            salience = mem.get("salience", 0)
-            mem_id = mem.get("id", "unknown")
-            
-            output_lines.append(f"\n{i}. [{sector}] (relevance: {score:.2f}, salience: {salience:.2f})")
-            output_lines.append(f"   ID: {mem_id}")
-            output_lines.append(f"   {content}")
+            content, score, sector, salience, mem_id = _RECALL_FIELDS(mem)
+            output_lines.append(
+                f"\n{i}. [{sector}] (relevance: {score:.2f}, salience: {salience:.2f})\n   ID: {mem_id}\n   {content}"
+            )
         
         logger.info("memory_recalled", query=query, count=len(memories))
         return "\n".join(output_lines)
         
-    except httpx.HTTPStatusError as e:
-        logger.error("memory_recall_failed", error=str(e), status=e.response.status_code)
-        return f"Failed to recall memories: {e.response.status_code}"
-    except httpx.ConnectError:
-        logger.error("memory_recall_failed", error="OpenMemory backend not reachable")
-        return "Memory system unavailable - OpenMemory backend is not running"
     except Exception as e:
         logger.error("memory_recall_failed", error=str(e))
         return f"Failed to recall memories: {str(e)}"
@@ -170,19 +165,11 @@ async def forget(memory_id: str) -> str:
         Confirmation that the memory was deleted
     """
     try:
-        await _call_openmemory(f"/memory/{memory_id}", method="DELETE")
+        await _run(_get_memory().delete, memory_id)
         
         logger.info("memory_deleted", id=memory_id)
         return f"Memory {memory_id} has been forgotten."
         
-    except httpx.HTTPStatusError as e:
-        if e.response.status_code == 404:
-            return f"Memory {memory_id} not found - it may have already been forgotten."
-        logger.error("memory_delete_failed", error=str(e), status=e.response.status_code)
-        return f"Failed to forget memory: {e.response.status_code}"
-    except httpx.ConnectError:
-        logger.error("memory_delete_failed", error="OpenMemory backend not reachable")
-        return "Memory system unavailable - OpenMemory backend is not running"
     except Exception as e:
         logger.error("memory_delete_failed", error=str(e))
         return f"Failed to forget memory: {str(e)}"
@@ -206,25 +193,14 @@ async def memory_status(
         Memory statistics and recent memories
     """
     try:
-        # Get health/stats first
-        health = await _call_openmemory("/health", method="GET")
-        
-        # Get memories - use query params
-        params = {"l": min(limit, 50)}
-        if sector:
-            params["sector"] = sector
-        
-        result = await _call_openmemory("/memory/all", method="GET", json_data=params)
-        memories = result.get("items", []) if isinstance(result, dict) else result
+        matches = await _run(list_memories, _get_memory(), limit, sector)
+        memories = [_normalize(m) for m in matches]
         
         # Format output
-        tier = health.get("tier", "unknown")
-        embedding_provider = health.get("embedding", {}).get("provider", "unknown")
-        
         output_lines = [
             "📊 Memory System Status",
-            f"   Tier: {tier}",
-            f"   Embeddings: {embedding_provider}",
+            f"   Tier: {MEMORY_TIER}",
+            f"   Embeddings: {EMBEDDINGS_CONFIG['provider']} ({EMBEDDINGS_CONFIG['model']})",
             f"   Memories shown: {len(memories)}",
             ""
         ]
@@ -237,19 +213,14 @@ async def memory_status(
         if not memories:
             output_lines.append("   (no memories stored)")
         else:
-            for mem in memories[:limit]:
-                content = mem.get("content", "")[:60]
-                sector_name = mem.get("primary_sector", "?")
-                salience = mem.get("salience", 0)
-                mem_id = mem.get("id", "?")[:8]
-                output_lines.append(f"   • [{sector_name}] {content}{'...' if len(mem.get('content', '')) > 60 else ''} (salience: {salience:.2f}, id: {mem_id}...)")
+            for mem in memories:
+                content, sector_name, salience, mem_id = _STATUS_FIELDS(mem)
+                ellipsis = "..." if len(content) > 60 else ""
+                output_lines.append(f"   • [{sector_name}] {content[:60]}{ellipsis} (salience: {salience:.2f}, id: {mem_id[:8]}...)")
         
         logger.info("memory_status_retrieved", count=len(memories), sector=sector)
         return "\n".join(output_lines)
         
-    except httpx.ConnectError:
-        logger.error("memory_status_failed", error="OpenMemory backend not reachable")
-        return "Memory system unavailable - OpenMemory backend is not running at http://localhost:8080"
     except Exception as e:
         logger.error("memory_status_failed", error=str(e))
         return f"Failed to get memory status: {str(e)}"
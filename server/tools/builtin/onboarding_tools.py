@@ -6,9 +6,11 @@ Guides new users through a conversational questionnaire to build
 their initial memory profile with personal info, preferences, and context.
 """
 
+import functools
 import logging
 from typing import Optional
 from ..registry import tool_registry
+from ...session import current_session
 
 logger = logging.getLogger(__name__)
 
@@ -40,27 +42,90 @@ ONBOARDING_QUESTIONS = {
     ]
 }
 
-# Session state for tracking onboarding progress
-_onboarding_state = {
-    "active": False,
-    "current_category": None,
-    "current_question_index": 0,
-    "responses": {},
-    "categories_completed": []
-}
+# Question count per category (the question table is static)
+_CAT_LEN = {cat: len(questions) for cat, questions in ONBOARDING_QUESTIONS.items()}
+
+QUICK_CATEGORIES = ("basic", "work", "preferences")
+ALL_CATEGORIES = ("basic", "work", "preferences", "interests", "goals")
+
+# Replies that end onboarding early / skip the current question
+_STOP_CMDS = frozenset({"stop onboarding", "quit", "exit", "done"})
+_SKIP_CMDS = frozenset({"skip", "pass", "next"})
+
+_INTRO_TEMPLATE = """👋 Welcome! I'm Felix, your AI voice assistant.
+
+I'd like to get to know you better through a brief questionnaire. Your answers will be stored in my long-term memory system, allowing me to:
+• Remember your preferences and context across sessions
+• Personalize responses based on your work and interests  
+• Provide more relevant suggestions and help
+• Build on past conversations naturally
+
+**{mode}Onboarding** - {total} questions total
 
+**Question 1/{total}** - {cat}
+
+{q}
+
+_(Say "skip" to skip, or "stop onboarding" to finish early)_"""
 
-def _get_total_questions(categories):
+_QUESTION_TEMPLATE = """**Question {num}/{total}** - {cat}
+
+{q}"""
+
+
+def _new_state() -> dict:
+    """Create empty onboarding progress state."""
+    return {
+        "active": False,
+        "current_category": None,
+        "current_question_index": 0,
+        "responses": {},
+        "categories_completed": [],
+        "completed_count": 0  # Questions in categories_completed
+    }
+
+
+# Used when no voice session is bound (scripts, tests)
+_fallback_state = _new_state()
+
+
+def _get_state() -> dict:
+    """Get the onboarding state of the current session."""
+    session = current_session.get()
+    if session is None:
+        return _fallback_state
+    
+    state = session.tool_state.get("onboarding")
+    if state is None:
+        state = session.tool_state["onboarding"] = _new_state()
+    return state
+
+
+@functools.lru_cache(maxsize=None)
+def _get_total_questions(categories: tuple) -> int:
     """Calculate total number of questions for given categories."""
-    return sum(len(ONBOARDING_QUESTIONS[cat]) for cat in categories)
+    return sum(_CAT_LEN[cat] for cat in categories)
+
+
+async def _store_memories(memories: list[dict]) -> bool:
+    """Store onboarding memories in one batch; False if memory is unavailable."""
+    from . import memory_tools  # None when disabled or openmemory is missing
+    
+    if memory_tools is None:
+        return False
+    
+    try:
+        await memory_tools.store_many(memories, salience=0.8)  # Onboarding info is high priority
+        return True
+    except Exception as e:
+        logger.error("onboarding_memory_store_failed: %s", e)
+        return False
 
 
 def _get_current_question_number():
     """Get the current overall question number (1-indexed)."""
-    state = _onboarding_state
-    completed = 0
-    for cat in state["categories_completed"]:
-        completed += len(ONBOARDING_QUESTIONS[cat])
+    state = _get_state()
+    completed = state["completed_count"]
     
     current_cat = state["current_category"]
     if current_cat:
@@ -69,6 +134,22 @@ def _get_current_question_number():
     return completed
 
 
+def _summary_lines(responses: dict, total_qa: int, memory_count: int, stored: bool):
+    """Yield the lines of the onboarding completion summary."""
+    yield "🎉 **Onboarding Complete!**\n"
+    yield f"Collected {total_qa} pieces of information:\n"
+    
+    for category, qa_list in responses.items():
+        yield f"**{category.title()}:**"
+        for qa in qa_list:
+            yield f"  • {qa['question']}"
+            yield f"    → {qa['answer']}"
+    
+    verb = "has been" if stored else "will be"
+    yield f"\n📝 All information {verb} stored in my memory using {memory_count} memory entries."
+    yield "\nI'll now remember these details across all our conversations!"
+
+
 @tool_registry.register(
     description="Start the onboarding workflow to help Felix learn about the user. Use this for new users or when someone asks to set up their profile."
 )
@@ -82,44 +163,34 @@ async def start_onboarding(quick_mode: Optional[bool] = False) -> str:
     Returns:
         Welcome message with first question
     """
-    global _onboarding_state
+    state = _get_state()
     
-    _onboarding_state["active"] = True
-    _onboarding_state["current_category"] = "basic"
-    _onboarding_state["current_question_index"] = 0
-    _onboarding_state["responses"] = {}
-    _onboarding_state["categories_completed"] = []
+    state["active"] = True
+    state["current_category"] = "basic"
+    state["current_question_index"] = 0
+    state["responses"] = {}
+    state["categories_completed"] = []
+    state["completed_count"] = 0
     
     if quick_mode:
-        _onboarding_state["categories"] = ["basic", "work", "preferences"]
+        state["categories"] = QUICK_CATEGORIES
     else:
-        _onboarding_state["categories"] = ["basic", "work", "preferences", "interests", "goals"]
+        state["categories"] = ALL_CATEGORIES
     
-    logger.info("onboarding_started", quick_mode=quick_mode)
+    logger.info("onboarding_started: quick_mode=%s", quick_mode)
     
     # Get first question
-    category = _onboarding_state["current_category"]
+    category = state["current_category"]
     question = ONBOARDING_QUESTIONS[category][0]
-    total_questions = _get_total_questions(_onboarding_state["categories"])
+    total_questions = _get_total_questions(state["categories"])
     
     mode_text = "Quick " if quick_mode else ""
-    intro = f"""👋 Welcome! I'm Felix, your AI voice assistant.
-
-I'd like to get to know you better through a brief questionnaire. Your answers will be stored in my long-term memory system, allowing me to:
-• Remember your preferences and context across sessions
-• Personalize responses based on your work and interests  
-• Provide more relevant suggestions and help
-• Build on past conversations naturally
-
-**{mode_text}Onboarding** - {total_questions} questions total
-
-**Question 1/{total_questions}** - {category.title()}
-
-{question}
-
-_(Say "skip" to skip, or "stop onboarding" to finish early)_"""
-    
-    return intro
+    return _INTRO_TEMPLATE.format(
+        mode=mode_text,
+        total=total_questions,
+        cat=category.title(),
+        q=question,
+    )
 
 
 @tool_registry.register(
@@ -135,59 +206,59 @@ async def onboarding_next(user_response: str) -> str:
     Returns:
         Next question or completion message
     """
-    global _onboarding_state
+    state = _get_state()
     
-    if not _onboarding_state["active"]:
+    if not state["active"]:
         return "No onboarding in progress. Use start_onboarding() to begin."
     
     # Handle special commands
-    if user_response.lower().strip() in ["stop onboarding", "quit", "exit", "done"]:
+    cmd = user_response.strip().lower()
+    if cmd in _STOP_CMDS:
         return await complete_onboarding()
     
-    skip = user_response.lower().strip() in ["skip", "pass", "next"]
+    skip = cmd in _SKIP_CMDS
     
     # Store response if not skipping
     if not skip:
-        category = _onboarding_state["current_category"]
-        q_index = _onboarding_state["current_question_index"]
+        category = state["current_category"]
+        q_index = state["current_question_index"]
         question = ONBOARDING_QUESTIONS[category][q_index]
         
-        if category not in _onboarding_state["responses"]:
-            _onboarding_state["responses"][category] = []
+        if category not in state["responses"]:
+            state["responses"][category] = []
         
-        _onboarding_state["responses"][category].append({
+        state["responses"][category].append({
             "question": question,
             "answer": user_response
         })
     
     # Move to next question
-    _onboarding_state["current_question_index"] += 1
+    state["current_question_index"] += 1
     
     # Check if current category is complete
-    category = _onboarding_state["current_category"]
-    if _onboarding_state["current_question_index"] >= len(ONBOARDING_QUESTIONS[category]):
-        _onboarding_state["categories_completed"].append(category)
+    category = state["current_category"]
+    if state["current_question_index"] >= _CAT_LEN[category]:
+        state["categories_completed"].append(category)
+        state["completed_count"] += _CAT_LEN[category]
         
         # Move to next category
-        current_cat_idx = _onboarding_state["categories"].index(category)
-        if current_cat_idx + 1 < len(_onboarding_state["categories"]):
-            _onboarding_state["current_category"] = _onboarding_state["categories"][current_cat_idx + 1]
-            _onboarding_state["current_question_index"] = 0
+        current_cat_idx = state["categories"].index(category)
+        if current_cat_idx + 1 < len(state["categories"]):
+            state["current_category"] = state["categories"][current_cat_idx + 1]
+            state["current_question_index"] = 0
         else:
             # All categories complete
             return await complete_onboarding()
     
     # Get next question
-    category = _onboarding_state["current_category"]
-    q_index = _onboarding_state["current_question_index"]
+    category = state["current_category"]
+    q_index = state["current_question_index"]
     question = ONBOARDING_QUESTIONS[category][q_index]
     
     current_q = _get_current_question_number()
-    total_q = _get_total_questions(_onboarding_state["categories"])
+    total_q = _get_total_questions(state["categories"])
     
-    return f"""**Question {current_q}/{total_q}** - {category.title()}
-
-{question}"""
+    return _QUESTION_TEMPLATE.format(num=current_q, total=total_q, cat=category.title(), q=question)
 
 
 @tool_registry.register(
@@ -200,55 +271,46 @@ async def complete_onboarding() -> str:
     Returns:
         Summary of stored memories
     """
-    global _onboarding_state
+    state = _get_state()
     
-    if not _onboarding_state["active"]:
+    if not state["active"]:
         return "No onboarding in progress."
     
-    _onboarding_state["active"] = False
+    state["active"] = False
     
     # Format responses for storage
-    responses = _onboarding_state["responses"]
+    responses = state["responses"]
     total_qa = sum(len(qa_list) for qa_list in responses.values())
     
     if total_qa == 0:
         logger.info("onboarding_completed_empty")
         return "Onboarding completed, but no information was provided. You can start over with start_onboarding() if you'd like."
     
-    # Build summary
-    summary_lines = ["🎉 **Onboarding Complete!**\n", f"Collected {total_qa} pieces of information:\n"]
-    
-    memories_to_store = []
-    
-    for category, qa_list in responses.items():
-        summary_lines.append(f"**{category.title()}:**")
-        for qa in qa_list:
-            summary_lines.append(f"  • {qa['question']}")
-            summary_lines.append(f"    → {qa['answer']}")
-            
-            # Prepare memory entry
-            memories_to_store.append({
-                "content": f"[{qa['question']}] {qa['answer']}",
-                "tags": [category, "onboarding", "profile"],
-                "importance": "high"  # Onboarding info is high priority
-            })
-    
-    summary_lines.append(f"\n📝 All information will be stored in my memory using {len(memories_to_store)} memory entries.")
-    summary_lines.append("\nI'll now remember these details across all our conversations!")
+    memories_to_store = [
+        {
+            "content": f"[{qa['question']}] {qa['answer']}",
+            "tags": [category, "onboarding", "profile"],
+            "importance": "high"  # Onboarding info is high priority
+        }
+        for category, qa_list in responses.items()
+        for qa in qa_list
+    ]
     
-    logger.info("onboarding_completed", 
-                categories=len(responses), 
-                total_responses=total_qa,
-                memories=len(memories_to_store))
+    stored = await _store_memories(memories_to_store)
     
-    # Return summary with instruction to use remember() for each entry
-    summary = "\n".join(summary_lines)
+    logger.info("onboarding_completed: categories=%d responses=%d memories=%d stored=%s",
+                len(responses), total_qa, len(memories_to_store), stored)
     
-    # Add metadata about what to do next
-    summary += "\n\n_Note: Use the remember() tool to store each of these memories now._"
+    summary = "\n".join(_summary_lines(responses, total_qa, len(memories_to_store), stored))
     
-    # Store the list of memories to be saved
-    _onboarding_state["pending_memories"] = memories_to_store
+    if not stored:
+        # Memory backend unavailable or failed: fall back to storing entries one by one.
+        # A batch that failed partway may already have stored some of them.
+        summary += (
+            "\n\n_Note: Use the remember() tool to store each of these memories now "
+            "(if saving failed partway, some may already be stored; check with recall() first)._"
+        )
+        state["pending_memories"] = memories_to_store
     
     return summary
 
@@ -263,15 +325,11 @@ async def get_onboarding_memories() -> list:
     Returns:
         List of memory objects ready to be stored
     """
-    global _onboarding_state
+    # Take and clear in one step so concurrent callers can't both get the list
+    memories = _get_state().pop("pending_memories", [])
     
-    if "pending_memories" not in _onboarding_state or not _onboarding_state["pending_memories"]:
-        return []
-    
-    memories = _onboarding_state["pending_memories"]
-    _onboarding_state["pending_memories"] = []  # Clear after retrieval
-    
-    logger.info("onboarding_memories_retrieved", count=len(memories))
+    if memories:
+        logger.info("onboarding_memories_retrieved: %d", len(memories))
     return memories
 
 
@@ -285,20 +343,22 @@ async def onboarding_status() -> str:
     Returns:
         Status information
     """
-    if not _onboarding_state["active"]:
+    state = _get_state()
+    
+    if not state["active"]:
         return "No onboarding in progress. Use start_onboarding() to begin."
     
-    category = _onboarding_state["current_category"]
-    q_index = _onboarding_state["current_question_index"]
-    completed = len(_onboarding_state["categories_completed"])
-    total = len(_onboarding_state["categories"])
+    category = state["current_category"]
+    q_index = state["current_question_index"]
+    completed = len(state["categories_completed"])
+    total = len(state["categories"])
     
     status = f"""📋 **Onboarding Status**
 
 **Progress:** {completed}/{total} categories completed
 **Current Category:** {category.title()}
-**Question:** {q_index + 1}/{len(ONBOARDING_QUESTIONS[category])}
-**Responses Collected:** {sum(len(qa) for qa in _onboarding_state['responses'].values())}
+**Question:** {q_index + 1}/{_CAT_LEN[category]}
+**Responses Collected:** {sum(len(qa) for qa in state['responses'].values())}
 
 Use onboarding_next() to continue, or complete_onboarding() to finish."""
     
@@ -8,6 +8,7 @@ Enabled packs are loaded from `Settings.enabled_tool_packs` (comma-separated).
 
 from __future__ import annotations
 
+import functools
 import importlib
 import structlog
 
@@ -20,12 +21,11 @@ def _parse_csv(value: str) -> list[str]:
     return [item.strip() for item in (value or "").split(",") if item.strip()]
 
 
-def load_enabled_tool_packs() -> list[str]:
-    """Import enabled pack modules and return the successfully loaded names."""
-    enabled = _parse_csv(getattr(settings, "enabled_tool_packs", ""))
+@functools.lru_cache(maxsize=None)
+def _load(csv: str) -> tuple[str, ...]:
     loaded: list[str] = []
 
-    for pack_name in enabled:
+    for pack_name in _parse_csv(csv):
         module_name = f"{__name__}.{pack_name}"
         try:
             importlib.import_module(module_name)
@@ -34,4 +34,13 @@ def load_enabled_tool_packs() -> list[str]:
         except Exception as e:
             logger.warning("tool_pack_failed", pack=pack_name, error=str(e))
 
-    return loaded
+    return tuple(loaded)
+
+
+def load_enabled_tool_packs() -> list[str]:
+    """Import enabled pack modules and return the successfully loaded names.
+
+    Results are memoized per `enabled_tool_packs` value, so repeat calls are
+    cheap; `_load.cache_clear()` forces a fresh import pass.
+    """
+    return list(_load(getattr(settings, "enabled_tool_packs", "") or ""))
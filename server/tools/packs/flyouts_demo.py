@@ -10,6 +10,14 @@ from __future__ import annotations
 
 from ..registry import tool_registry
 
+# Flyout content per panel type, built from (title, body)
+_CONTENT_BUILDERS = {
+    "browser": lambda title, body: "https://example.com",
+    "code": lambda title, body: f"# {title}\n\n{body}\n",
+    "terminal": lambda title, body: f"$ echo '{title}'\n{body}",
+}
+_VALID_TYPES = frozenset(_CONTENT_BUILDERS)
+
 
 @tool_registry.register(
     name="demo_flyout_card",
@@ -29,15 +37,10 @@ async def demo_flyout_card(
         flyout_type: One of: browser, code, terminal
     """
     flyout_type = (flyout_type or "code").strip().lower()
-    if flyout_type not in {"browser", "code", "terminal"}:
+    if flyout_type not in _VALID_TYPES:
         flyout_type = "code"
 
-    if flyout_type == "browser":
-        content = "https://example.com"
-    elif flyout_type == "terminal":
-        content = f"$ echo '{title}'\n{body}"
-    else:
-        content = f"# {title}\n\n{body}\n"
+    content = _CONTENT_BUILDERS[flyout_type](title, body)
 
     return {
         "text": f"Opening {title} in the {flyout_type} panel.",
@@ -40,6 +40,8 @@ class ToolRegistry:
     def __init__(self):
         self._tools: dict[str, Tool] = {}
         self._categories: dict[str, list[str]] = {}
+        self._loaders: list[Callable[[], None]] = []
+        self._loading = False
     
     def register(
         self,
@@ -94,6 +96,36 @@ class ToolRegistry:
         
         return decorator
     
+    def add_loader(self, loader: Callable[[], None]) -> None:
+        """
+        Defer tool registration until the registry is first consulted.
+        
+        The loader runs once, before the next lookup or listing.
+        """
+        self._loaders.append(loader)
+    
+    def _run_loaders(self) -> None:
+        """
+        Run pending loaders.
+        
+        A loader is dropped only once it succeeds; one that raises stays
+        pending and is retried on the next lookup.
+        """
+        if self._loading or not self._loaders:
+            return
+        self._loading = True
+        try:
+            while self._loaders:
+                self._loaders[0]()
+                self._loaders.pop(0)
+        finally:
+            self._loading = False
+        logger.info("tools_loaded", count=len(self._tools), tools=list(self._tools))
+    
+    def registered_count(self) -> int:
+        """Number of tools registered so far (doesn't run pending loaders)."""
+        return len(self._tools)
+    
     def _infer_parameters(self, func: Callable) -> dict:
         """Infer JSON schema parameters from function signature."""
         sig = inspect.signature(func)
@@ -137,10 +169,12 @@ class ToolRegistry:
     
     def get_tool(self, name: str) -> Optional[Tool]:
         """Get a tool by name."""
+        self._run_loaders()
         return self._tools.get(name)
     
     def get_all_tools(self) -> list[Tool]:
         """Get all registered tools."""
+        self._run_loaders()
         return list(self._tools.values())
     
     def list_tools(self) -> list[Tool]:
@@ -149,6 +183,7 @@ class ToolRegistry:
     
     def get_tools_by_category(self, category: str) -> list[Tool]:
         """Get tools in a specific category."""
+        self._run_loaders()
         tool_names = self._categories.get(category, [])
         return [self._tools[name] for name in tool_names]
     
@@ -159,6 +194,7 @@ class ToolRegistry:
         Returns:
             List of tool definitions in OpenAI/Ollama format
         """
+        self._run_loaders()
         return [
             {
                 "type": "function",
@@ -0,0 +1,76 @@
+"""
+Tests for the embedded ComfyUI service.
+"""
+import asyncio
+
+import pytest
+
+
+@pytest.fixture
+async def service():
+    """A ComfyUIService that is never started (no ComfyUI process)."""
+    from server.comfy_service import ComfyUIService
+
+    service = ComfyUIService()
+    yield service
+    await service.client.aclose()
+
+
+class TestComfyUIService:
+    """Test ComfyUI event-stream handling."""
+
+    @pytest.mark.asyncio
+    async def test_executing_without_node_completes_prompt(self, service):
+        """An `executing` event with node None resolves the prompt's waiter."""
+        waiter = asyncio.get_running_loop().create_future()
+        service._prompt_waiters["p1"] = waiter
+
+        service._dispatch_ws_message({"type": "executing", "data": {"node": "3", "prompt_id": "p1"}})
+        service._dispatch_ws_message({"type": "executing", "data": {"node": "3", "prompt_id": "other"}})
+        assert not waiter.done()
+
+        service._dispatch_ws_message({"type": "executing", "data": {"node": None, "prompt_id": "p1"}})
+        assert waiter.done() and waiter.result() is None
+
+    @pytest.mark.asyncio
+    async def test_execution_error_fails_prompt(self, service):
+        """An `execution_error` event fails the prompt's waiter with ComfyUI's message."""
+        waiter = asyncio.get_running_loop().create_future()
+        service._prompt_waiters["p1"] = waiter
+
+        service._dispatch_ws_message({
+            "type": "execution_error",
+            "data": {"prompt_id": "p1", "exception_message": "CUDA out of memory"},
+        })
+
+        with pytest.raises(RuntimeError, match="CUDA out of memory"):
+            await service.wait_for_prompt("p1", timeout=1)
+        assert "p1" not in service._prompt_waiters
+
+    @pytest.mark.asyncio
+    async def test_concurrent_connect_ws_opens_one_socket(self):
+        """Batches connecting at once share one event-stream socket."""
+        import websockets
+        from server.comfy_service import ComfyUIService
+
+        connections = set()
+
+        async def handler(ws):
+            connections.add(ws)
+            try:
+                await ws.wait_closed()
+            finally:
+                connections.discard(ws)
+
+        async with websockets.serve(handler, "127.0.0.1", 0) as server:
+            port = next(iter(server.sockets)).getsockname()[1]
+            service = ComfyUIService(port=port)
+
+            await asyncio.gather(service.connect_ws(), service.connect_ws(), service.connect_ws())
+            await asyncio.sleep(0.05)
+            assert len(connections) == 1
+
+            await service.close_ws()
+            await asyncio.sleep(0.05)
+            assert not connections
+            await service.client.aclose()
@@ -0,0 +1,94 @@
+"""
+Tests for STT backend routing and fallback.
+"""
+import sys
+import types
+
+import pytest
+
+
+def _backend_module(name, fail=None):
+    """A stand-in for a server.stt backend module."""
+    module = types.ModuleType(name)
+
+    async def get_stt():
+        if fail and fail():
+            raise RuntimeError(f"{name} failed")
+        return name
+
+    async def transcribe_audio(audio_data, sample_rate=16000):
+        if fail and fail():
+            raise RuntimeError(f"{name} failed")
+        return f"{name} text"
+
+    module.get_stt = get_stt
+    module.transcribe_audio = transcribe_audio
+    return module
+
+
+@pytest.fixture
+def stt(monkeypatch):
+    """server.stt with stubbed whisper / whisper_cpp backends and fresh caches."""
+    import server.stt as stt
+    from server.config import settings
+
+    failing = {"whisper-cpp": False}
+
+    monkeypatch.setitem(sys.modules, "server.stt.whisper", _backend_module("faster-whisper"))
+    monkeypatch.setitem(
+        sys.modules,
+        "server.stt.whisper_cpp",
+        _backend_module("whisper-cpp", fail=lambda: failing["whisper-cpp"]),
+    )
+    monkeypatch.setattr(settings, "stt_backend", "whisper-cpp")
+    monkeypatch.setattr(stt, "_active_backend", "faster-whisper")
+
+    stt._resolve_backend.cache_clear()
+    stt._faster_whisper_backend.cache_clear()
+    yield types.SimpleNamespace(module=stt, settings=settings, failing=failing)
+    stt._resolve_backend.cache_clear()
+    stt._faster_whisper_backend.cache_clear()
+
+
+class TestSTTRouting:
+    """Test backend resolution and call-time fallback."""
+
+    @pytest.mark.asyncio
+    async def test_backend_resolved_once_per_setting(self, stt):
+        """The backend is resolved once per settings.stt_backend value."""
+        await stt.module.get_stt()
+        await stt.module.transcribe_audio(b"\0\0")
+        assert stt.module._resolve_backend.cache_info().misses == 1
+
+        stt.settings.stt_backend = "faster-whisper"
+        assert await stt.module.get_stt() == "faster-whisper"
+        await stt.module.transcribe_audio(b"\0\0")
+        assert stt.module._resolve_backend.cache_info().misses == 2
+        assert stt.module.get_active_stt_backend() == "faster-whisper"
+
+    @pytest.mark.asyncio
+    async def test_unavailable_whisper_cpp_falls_back_at_resolution(self, stt, monkeypatch):
+        """A whisper.cpp backend that can't be imported is replaced by faster-whisper."""
+        monkeypatch.setitem(sys.modules, "server.stt.whisper_cpp", None)
+
+        assert await stt.module.transcribe_audio(b"\0\0") == "faster-whisper text"
+        assert stt.module.get_active_stt_backend() == "faster-whisper"
+
+    @pytest.mark.asyncio
+    async def test_call_time_failure_falls_back_then_recovers(self, stt):
+        """A failing whisper.cpp call uses faster-whisper; a later success reports whisper.cpp again."""
+        stt.failing["whisper-cpp"] = True
+        assert await stt.module.transcribe_audio(b"\0\0") == "faster-whisper text"
+        assert stt.module.get_active_stt_backend() == "faster-whisper"
+
+        stt.failing["whisper-cpp"] = False
+        assert await stt.module.transcribe_audio(b"\0\0") == "whisper-cpp text"
+        assert stt.module.get_active_stt_backend() == "whisper-cpp"
+
+        stt.failing["whisper-cpp"] = True
+        assert await stt.module.get_stt() == "faster-whisper"
+        assert stt.module.get_active_stt_backend() == "faster-whisper"
+
+        stt.failing["whisper-cpp"] = False
+        assert await stt.module.get_stt() == "whisper-cpp"
+        assert stt.module.get_active_stt_backend() == "whisper-cpp"
@@ -53,6 +53,89 @@ class TestToolRegistry:
             assert hasattr(tool, 'description')
             assert len(tool.description) > 0
 
+    def test_loader_runs_once_on_first_lookup(self):
+        """Test that deferred loaders run once, before the first lookup."""
+        from server.tools.registry import ToolRegistry
+
+        registry = ToolRegistry()
+        calls = []
+
+        def loader():
+            calls.append(1)
+
+            @registry.register(description="Loaded lazily")
+            async def lazy_tool() -> str:
+                return "ok"
+
+        registry.add_loader(loader)
+        assert calls == []
+
+        assert registry.get_tool("lazy_tool") is not None
+        assert len(registry.list_tools()) == 1
+        assert calls == [1]
+
+
+    def test_failed_loader_is_retried(self):
+        """Test that a loader that raises stays pending for the next lookup."""
+        from server.tools.registry import ToolRegistry
+
+        registry = ToolRegistry()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            if len(calls) == 1:
+                raise ImportError("flaky tool module")
+
+            @registry.register(description="Loaded on retry")
+            async def retried_tool() -> str:
+                return "ok"
+
+        registry.add_loader(loader)
+        with pytest.raises(ImportError):
+            registry.get_tool("retried_tool")
+
+        assert registry.get_tool("retried_tool") is not None
+        assert calls == [1, 1]
+
+    def test_builtin_modules_resolve_lazily(self, monkeypatch):
+        """Test that builtin tool modules import on first attribute access."""
+        import sys
+        from server.tools import builtin, tool_registry
+
+        # Re-importing re-registers tools; keep that out of the shared registry
+        tool_registry.list_tools()
+        monkeypatch.setattr(tool_registry, "_tools", dict(tool_registry._tools))
+        monkeypatch.setattr(tool_registry, "_categories", {c: list(n) for c, n in tool_registry._categories.items()})
+
+        name = f"{builtin.__name__}.datetime_tools"
+        monkeypatch.delitem(vars(builtin), "datetime_tools")
+        monkeypatch.delitem(sys.modules, name)
+        assert name not in sys.modules
+
+        module = builtin.datetime_tools
+
+        assert module is sys.modules[name]
+        assert vars(builtin)["datetime_tools"] is module
+
+    def test_disabled_builtin_modules_resolve_to_none(self, monkeypatch):
+        """Test that disabled modules and ones missing their optional dep are None."""
+        import sys
+        from server.tools import builtin, tool_registry
+
+        # Resolve everything first so the deletions below are restored afterwards
+        tool_registry.list_tools()
+        monkeypatch.setattr(builtin, "_DISABLED", frozenset({"weather_tools"}))
+        monkeypatch.delitem(vars(builtin), "weather_tools")
+        monkeypatch.delitem(sys.modules, f"{builtin.__name__}.weather_tools", raising=False)
+        assert builtin.weather_tools is None
+        assert f"{builtin.__name__}.weather_tools" not in sys.modules
+
+        monkeypatch.setitem(sys.modules, "openmemory", None)
+        monkeypatch.delitem(vars(builtin), "memory_tools")
+        monkeypatch.delitem(sys.modules, f"{builtin.__name__}.memory_tools", raising=False)
+        assert builtin.memory_tools is None
+
 
 class TestDateTimeTools:
     """Test built-in date/time tools."""
@@ -207,3 +290,298 @@ class TestToolExecution:
         
         with pytest.raises(ValueError):
             await tool_registry.execute("unknown_tool_that_does_not_exist")
+
+
+class TestImageTools:
+    """Test image generation request batching (ComfyUI is faked)."""
+
+    @pytest.mark.asyncio
+    async def test_identical_requests_share_one_submission(self, monkeypatch):
+        """Concurrent identical requests are queued as one batched workflow."""
+        from server.tools.builtin import image_tools
+
+        class FakeComfyService:
+            base_url = "http://127.0.0.1:8188"
+
+            def __init__(self):
+                self.workflows = []
+
+            async def ensure_started(self):
+                return True
+
+            async def connect_ws(self):
+                pass
+
+            async def queue_prompt(self, workflow):
+                self.workflows.append(workflow)
+                return f"prompt-{len(self.workflows)}"
+
+            async def wait_for_prompt(self, prompt_id, timeout=120.0):
+                pass
+
+            async def get_history(self, prompt_id):
+                batch_size = self.workflows[-1]["5"]["inputs"]["batch_size"]
+                images = [{"filename": f"{prompt_id}_{i}.png"} for i in range(batch_size)]
+                return {prompt_id: {"outputs": {"9": {"images": images}}}}
+
+        service = FakeComfyService()
+        monkeypatch.setattr(image_tools, "get_comfy_service", lambda: service)
+
+        results = await asyncio.gather(
+            image_tools.generate_image("a cat"),
+            image_tools.generate_image("a cat"),
+            image_tools.generate_image("a dog"),
+        )
+
+        batch_sizes = sorted(w["5"]["inputs"]["batch_size"] for w in service.workflows)
+        assert batch_sizes == [1, 2]
+        assert all(r.startswith("✅") for r in results)
+        # Each caller in the shared batch gets a different image
+        assert len({r.split("saved as: ")[1] for r in results}) == 3
+
+
+class TestOnboardingTools:
+    """Test the onboarding questionnaire flow."""
+
+    @pytest.mark.asyncio
+    async def test_quick_onboarding_numbers_questions(self):
+        """Quick mode walks 9 questions in order and then completes."""
+        from server.tools.builtin import onboarding_tools
+
+        intro = await onboarding_tools.start_onboarding(quick_mode=True)
+        assert "**Question 1/9**" in intro
+
+        reply = await onboarding_tools.onboarding_next("Sam")
+        assert "**Question 2/9**" in reply
+
+        reply = await onboarding_tools.onboarding_next("skip")
+        assert "**Question 3/9**" in reply
+
+        # Finishing the "basic" category moves on to "work"
+        reply = await onboarding_tools.onboarding_next("Berlin")
+        assert "**Question 4/9** - Work" in reply
+
+        for answer in ["dev", "python", "felix", "brief", "dark"]:
+            reply = await onboarding_tools.onboarding_next(answer)
+        assert "**Question 9/9**" in reply
+
+        summary = await onboarding_tools.onboarding_next("evenings")
+        assert "Onboarding Complete" in summary
+        assert "Collected 8 pieces of information" in summary
+
+    async def _finish_quick_onboarding(self, onboarding_tools, monkeypatch, answer_count=2):
+        # Fresh state, so pending memories from other tests don't leak in
+        monkeypatch.setattr(onboarding_tools, "_fallback_state", onboarding_tools._new_state())
+        await onboarding_tools.start_onboarding(quick_mode=True)
+        for i in range(answer_count):
+            await onboarding_tools.onboarding_next(f"answer {i}")
+        return await onboarding_tools.onboarding_next("done")
+
+    @pytest.mark.asyncio
+    async def test_complete_onboarding_stores_memories(self, monkeypatch):
+        """Answers are stored in one batch and nothing is left pending."""
+        import types
+        from server.tools import builtin
+        from server.tools.builtin import onboarding_tools
+
+        batches = []
+
+        async def store_many(memories, salience=0.5):
+            batches.append((memories, salience))
+            return [{"id": str(i)} for i in range(len(memories))]
+
+        monkeypatch.setattr(builtin, "memory_tools", types.SimpleNamespace(store_many=store_many), raising=False)
+
+        summary = await self._finish_quick_onboarding(onboarding_tools, monkeypatch)
+
+        assert "has been stored" in summary
+        assert len(batches) == 1
+        assert [m["content"] for m in batches[0][0]] == [
+            "[What's your name?] answer 0",
+            "[What do you prefer to be called?] answer 1",
+        ]
+        assert batches[0][1] == 0.8
+        assert await onboarding_tools.get_onboarding_memories() == []
+
+    @pytest.mark.asyncio
+    async def test_complete_onboarding_keeps_memories_when_store_fails(self, monkeypatch):
+        """A storage error leaves the answers pending instead of losing them."""
+        import types
+        from server.tools import builtin
+        from server.tools.builtin import onboarding_tools
+
+        async def store_many(memories, salience=0.5):
+            raise RuntimeError("ollama unreachable")
+
+        monkeypatch.setattr(builtin, "memory_tools", types.SimpleNamespace(store_many=store_many), raising=False)
+
+        summary = await self._finish_quick_onboarding(onboarding_tools, monkeypatch)
+
+        assert "will be stored" in summary
+        assert "remember()" in summary
+        pending = await onboarding_tools.get_onboarding_memories()
+        assert len(pending) == 2
+        assert await onboarding_tools.get_onboarding_memories() == []
+
+
+class TestMemoryIndex:
+    """Test the ANN memory recall index (Ollama embeddings are faked)."""
+
+    def _make_index(self, dtype="float32"):
+        import httpx
+        import json
+        from server.tools.builtin.memory_index import MemoryIndex
+
+        vocab = ["coffee", "berlin", "python", "music"]
+
+        def embed(request):
+            texts = json.loads(request.content)["input"]
+            vectors = [[float(word in t.lower()) + 0.01 for word in vocab] for t in texts]
+            return httpx.Response(200, json={"embeddings": vectors})
+
+        index = MemoryIndex("http://ollama.test", "test-embed", dtype=dtype)
+        index._client = httpx.Client(base_url="http://ollama.test", transport=httpx.MockTransport(embed))
+        return index
+
+    def test_search_ranks_by_similarity_and_skips_forgotten(self):
+        """Nearest memories come first and forgotten ones are never returned."""
+        pytest.importorskip("faiss")
+        index = self._make_index()
+
+        index.build([
+            {"id": "m1", "content": "Likes coffee", "sectors": ["semantic"]},
+            {"id": "m2", "content": "Lives in Berlin", "sectors": ["semantic"]},
+        ])
+        index.add([{"id": "m3", "content": "Writes Python", "primarySector": "procedural"}])
+
+        assert [m["id"] for m in index.search("python", k=1)] == ["m3"]
+        assert index.search("berlin coffee", k=3)[0]["id"] in {"m1", "m2"}
+
+        index.remove("m2")
+        assert "m2" not in [m["id"] for m in index.search("berlin", k=3)]
+
+    def test_add_skips_already_indexed_memories(self):
+        """Replaying an add (e.g. after a background rebuild) doesn't duplicate hits."""
+        pytest.importorskip("faiss")
+        index = self._make_index()
+
+        index.build([{"id": "m1", "content": "Likes coffee"}])
+        index.add([
+            {"id": "m1", "content": "Likes coffee"},
+            {"id": "m2", "content": "Loves music"},
+        ])
+
+        assert [m["id"] for m in index.search("coffee music", k=3)].count("m1") == 1
+
+    def test_int8_index_keeps_ranking(self):
+        """An int8-quantized index returns the same nearest memories."""
+        pytest.importorskip("faiss")
+        index = self._make_index(dtype="int8")
+
+        index.add([
+            {"id": "m1", "content": "Likes coffee"},
+            {"id": "m2", "content": "Loves music"},
+        ])
+
+        top = index.search("music", k=2)
+        assert [m["id"] for m in top] == ["m2", "m1"]
+        assert top[0]["score"] == pytest.approx(1.0, abs=0.02)
+
+    def test_saved_index_is_reloaded_and_still_writable(self, tmp_path):
+        """A saved index loads back (memory-mapped) and accepts new memories."""
+        pytest.importorskip("faiss")
+        path = tmp_path / "memory.db.hnsw"
+
+        index = self._make_index()
+        index.build([
+            {"id": "m1", "content": "Likes coffee"},
+            {"id": "m2", "content": "Lives in Berlin"},
+        ])
+        index.remove("m2")
+        index.save(path)
+
+        loaded = self._make_index()
+        assert loaded.load(path)
+        assert not loaded.dirty
+        assert [m["id"] for m in loaded.search("berlin coffee", k=3)] == ["m1"]
+
+        loaded.add([{"id": "m3", "content": "Loves music"}])
+        assert loaded.search("music", k=1)[0]["id"] == "m3"
+
+        # Rejected when memories were written after the save, or settings differ
+        assert not self._make_index().load(path, min_mtime=path.stat().st_mtime + 1)
+        assert not self._make_index(dtype="int8").load(path)
+
+
+@pytest.fixture
+def memory_tools(monkeypatch, tmp_path):
+    """memory_tools imported against a fake OpenMemory SDK (openmemory is optional)."""
+    import importlib
+    import sys
+    import types
+    from server.tools import builtin, tool_registry
+
+    class FakeOpenMemory:
+        def __init__(self, **kwargs):
+            self.queries = []
+
+        def query(self, query, k):
+            self.queries.append((query, k))
+            return [
+                {"id": f"{query}-{i}", "content": f"{query} {i}", "score": 0.9 - 0.2 * i, "sectors": ["semantic"]}
+                for i in range(k)
+            ]
+
+        def getAll(self, limit, sector=None):
+            self.queries.append(("getAll", limit, sector))
+            return [{"id": "m1-abcdef", "content": "Likes coffee", "sectors": [sector or "semantic"]}]
+
+    sdk = types.ModuleType("openmemory")
+    sdk.OpenMemory = FakeOpenMemory
+
+    # Load the real tool set first, then keep the fake module's tools out of it
+    tool_registry.list_tools()
+    monkeypatch.setattr(tool_registry, "_tools", dict(tool_registry._tools))
+    monkeypatch.setattr(tool_registry, "_categories", {c: list(n) for c, n in tool_registry._categories.items()})
+    monkeypatch.setattr(builtin, "memory_tools", builtin.memory_tools)
+    monkeypatch.setitem(sys.modules, "openmemory", sdk)
+    monkeypatch.delitem(sys.modules, "server.tools.builtin.memory_tools", raising=False)
+
+    module = importlib.import_module("server.tools.builtin.memory_tools")
+    monkeypatch.setattr(module, "MEMORY_DB_PATH", tmp_path / "memory.db")
+    monkeypatch.setattr(module, "_index_disabled", True)
+    yield module
+    sys.modules.pop("server.tools.builtin.memory_tools", None)
+
+
+class TestMemoryTools:
+    """Test the OpenMemory-backed memory tools."""
+
+    @pytest.mark.asyncio
+    async def test_recall_many_matches_recall_contract(self, memory_tools):
+        """recall_many caps k and filters by relevance like recall, in query order."""
+        results = await memory_tools.recall_many(["coffee", "berlin"], limit=3, min_relevance=0.6)
+
+        assert [[m["id"] for m in r] for r in results] == [
+            ["coffee-0", "coffee-1"],
+            ["berlin-0", "berlin-1"],
+        ]
+
+        await memory_tools.recall_many(["python"], limit=100)
+        assert memory_tools._get_memory().queries[-1] == ("python", 20)
+
+    @pytest.mark.asyncio
+    async def test_memory_status_lists_capped_memories(self, memory_tools):
+        """memory_status reads memories on the memory pool with the limit capped."""
+        status = await memory_tools.memory_status(sector="episodic", limit=500)
+
+        assert "[episodic] Likes coffee" in status
+        assert memory_tools._get_memory().queries == [("getAll", 50, "episodic")]
+
+    def test_parse_tags(self):
+        """Comma-separated tags are split and trimmed; empty input gives no tags."""
+        from server.tools.builtin.memory_common import parse_tags
+
+        assert parse_tags(None) == []
+        assert parse_tags(" ui ") == ["ui"]
+        assert parse_tags("preference, ui,settings") == ["preference", "ui", "settings"]